@@ -0,0 +1,3 @@
+from .verify_supabase_token import get_current_user, verify_token, invalidate_token
+
+__all__ = ['get_current_user', 'verify_token', 'invalidate_token']
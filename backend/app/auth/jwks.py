@@ -0,0 +1,146 @@
+"""
+Cache of the Supabase Auth signing keys.
+
+Keys are parsed once into public key objects and indexed by `kid`. The
+set is refreshed in the background every JWKS_CACHE_TTL seconds and on
+demand when a token names a key we have not seen (key rotation). All
+refreshes go through one lock, so a rotation triggers a single fetch no
+matter how many requests are waiting on it. A response that is not a
+usable key set fails like an unreachable endpoint, with JWKSError.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import jwt
+from core.config import SUPABASE_JWKS_URL, JWKS_CACHE_TTL, JWKS_MIN_REFRESH_INTERVAL
+from core.snapshot import LazyLock
+from core.supabase import get_http
+
+logger = logging.getLogger(__name__)
+
+class JWKSError(Exception):
+    """The JWKS endpoint answered with something that is not a key set"""
+
+class JWKSCache:
+    def __init__(self, url: str, ttl: float, min_refresh_interval: float):
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self._keys: Dict[str, Any] = {}
+        self._fetched_at = 0.0
+        self._lock = LazyLock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._stale_refresh: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def _age(self) -> float:
+        return time.monotonic() - self._fetched_at
+
+    async def _fetch(self) -> Dict[str, Any]:
+        response = await get_http().get(self.url)
+        response.raise_for_status()
+
+        try:
+            body = response.json()
+        except ValueError as e:
+            raise JWKSError(f"JWKS response is not JSON: {str(e)}")
+        jwks = body.get("keys") if isinstance(body, dict) else None
+        if not isinstance(jwks, list):
+            raise JWKSError("JWKS response has no list of keys")
+
+        keys = {}
+        for jwk in jwks:
+            kid = jwk.get("kid") if isinstance(jwk, dict) else None
+            if not kid:
+                continue
+            try:
+                keys[kid] = jwt.PyJWK(jwk).key
+            except (jwt.PyJWTError, ValueError, TypeError, KeyError) as e:
+                logger.warning(f"Skipping unusable JWK {kid}: {str(e)}")
+        return keys
+
+    async def refresh(self, min_age: float = 0.0) -> None:
+        """Reload the key set unless it is younger than min_age seconds"""
+        seen_fetch = self._fetched_at
+        async with self._lock:
+            # Another caller refreshed while we were waiting for the lock
+            if self._fetched_at != seen_fetch and self._keys:
+                return
+            if self._keys and self._age() < min_age:
+                return
+
+            self.refreshes += 1
+            try:
+                self._keys = await self._fetch()
+            except Exception as e:
+                self.refresh_errors += 1
+                logger.warning(f"Failed to refresh JWKS from {self.url}: {str(e)}")
+                if not self._keys:
+                    raise
+            finally:
+                self._fetched_at = time.monotonic()
+
+    async def get_key(self, kid: Optional[str]) -> Optional[Any]:
+        """Get the public key for a key ID, refreshing on an unknown kid"""
+        if not self._keys:
+            await self.refresh()
+        elif self._age() > self.ttl:
+            # Serve the current keys and let the background task catch up
+            self._schedule_refresh()
+
+        key = self._keys.get(kid)
+        if key is not None:
+            self.hits += 1
+            return key
+
+        self.misses += 1
+        await self.refresh(min_age=self.min_refresh_interval)
+        return self._keys.get(kid)
+
+    def _schedule_refresh(self) -> None:
+        if self._stale_refresh is None or self._stale_refresh.done():
+            self._stale_refresh = asyncio.create_task(self.refresh(min_age=self.ttl))
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.ttl)
+            # Only keep refreshing once a token has actually needed the JWKS
+            if not self._keys:
+                continue
+            try:
+                await self.refresh(min_age=self.ttl)
+            except Exception:
+                pass
+
+    def start(self) -> None:
+        """Start the background refresh loop (called on app startup)"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        """Stop the background refresh loop (called on app shutdown)"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys": len(self._keys),
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "age_seconds": round(self._age(), 1) if self._fetched_at else None,
+        }
+
+jwks_cache = JWKSCache(SUPABASE_JWKS_URL, JWKS_CACHE_TTL, JWKS_MIN_REFRESH_INTERVAL)
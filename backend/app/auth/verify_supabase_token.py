@@ -1,75 +1,138 @@
-import os
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+import hashlib
+import time
+import httpx
 import jwt
-import requests
-from dotenv import load_dotenv
-
-load_dotenv()
+from core.cache import ExpiringSet, TTLCache
+from core.config import SUPABASE_JWT_SECRET, AUTH_REMOTE_CHECK, TOKEN_CACHE_SIZE
+from core.supabase import create_auth_client
+from .jwks import JWKSError, jwks_cache
 
 security = HTTPBearer()
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-# Cache the public key
-_jwks = None
+# Signing algorithms Supabase Auth issues access tokens with
+ALLOWED_ALGORITHMS = ("HS256", "RS256", "ES256")
 
-async def get_jwks():
-    global _jwks
-    if _jwks is None:
-        jwks_url = f"{SUPABASE_URL}/auth/v1/jwks"
-        response = requests.get(jwks_url)
-        _jwks = response.json()
-    return _jwks
+# Verified claims keyed by token digest, each kept until the token's exp
+_token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE)
+# Digests of tokens explicitly logged out, kept until they would have expired
+# (never evicted early, or a logged-out token would be accepted again)
+_revoked_tokens = ExpiringSet()
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
-):
-    token = credentials.credentials
-    
+# Lifetime assumed for a revoked token whose exp cannot be read
+REVOKED_TOKEN_FALLBACK_TTL = 24 * 3600
+
+def _token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+async def get_signing_key(token: str):
+    """Resolve the key that signed the token from its header"""
+    # Decode the JWT header to get the algorithm and key ID (kid)
+    jwt_header = jwt.get_unverified_header(token)
+    alg = jwt_header.get("alg")
+
+    if alg not in ALLOWED_ALGORITHMS:
+        return None, alg
+
+    # Projects on symmetric signing share one secret for every token
+    if alg == "HS256":
+        if not SUPABASE_JWT_SECRET:
+            return None, alg
+        return SUPABASE_JWT_SECRET, alg
+
+    # Look up the pre-parsed public key for the kid in the JWT header
+    return await jwks_cache.get_key(jwt_header.get("kid")), alg
+
+async def verify_token(token: str) -> dict:
+    """Verify a Supabase access token locally and return its claims"""
+    digest = _token_digest(token)
+
+    if digest in _revoked_tokens:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+        )
+
+    # Repeat requests with the same token skip signature verification
+    payload = _token_cache.get(digest)
+    if payload is not None:
+        return payload
+
+    payload = await _decode_token(token)
+    if payload.get("exp"):
+        _token_cache.set(digest, payload, expires_at=payload["exp"])
+    return payload
+
+def invalidate_token(token: str) -> None:
+    """Drop a token from the cache and reject it until it expires (logout)"""
+    digest = _token_digest(token)
+    payload = _token_cache.pop(digest)
+    if not payload:
+        try:
+            payload = jwt.decode(token, options={"verify_signature": False})
+        except jwt.PyJWTError:
+            payload = {}
+    expires_at = payload.get("exp") or time.time() + REVOKED_TOKEN_FALLBACK_TTL
+    _revoked_tokens.add(digest, expires_at)
+
+def token_cache_stats() -> dict:
+    return {**_token_cache.stats(), "revoked": len(_revoked_tokens)}
+
+async def _decode_token(token: str) -> dict:
     try:
-        # Decode the JWT header to get the key ID (kid)
-        jwt_header = jwt.get_unverified_header(token)
-        kid = jwt_header.get("kid")
-        
-        # Get the JWKS
-        jwks = await get_jwks()
-        
-        # Find the signing key that matches the kid in the JWT header
-        signing_key = None
-        for key in jwks.get("keys", []):
-            if key.get("kid") == kid:
-                signing_key = jwt.algorithms.RSAAlgorithm.from_jwk(key)
-                break
-        
+        signing_key, alg = await get_signing_key(token)
+
         if not signing_key:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authentication credentials",
             )
-        
+
         # Verify and decode the token
-        payload = jwt.decode(
+        return jwt.decode(
             token,
             signing_key,
-            algorithms=["RS256"],
+            algorithms=[alg],
             audience="authenticated",
             options={"verify_exp": True},
         )
-        
-        # Extract user information
-        user = {
-            "id": payload.get("sub"),
-            "email": payload.get("email"),
-            "role": payload.get("role", "user"),
-        }
-        
-        return user
     except jwt.PyJWTError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid authentication credentials: {str(e)}",
         )
+    except (httpx.HTTPError, JWKSError):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication keys are unavailable",
+        )
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    token = credentials.credentials
+    payload = await verify_token(token)
+
+    # Optionally confirm with Supabase Auth that the session was not revoked
+    if AUTH_REMOTE_CHECK:
+        # The client is only built when it is used; get_user() keeps no session
+        try:
+            await create_auth_client().get_user(token)
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid authentication credentials",
+            )
+
+    # Extract user information
+    user = {
+        "id": payload.get("sub"),
+        "email": payload.get("email"),
+        "role": payload.get("role", "user"),
+    }
+
+    return user
 
 # Role-based access control decorator
 def RoleChecker(allowed_roles: list):
@@ -80,4 +143,4 @@ def RoleChecker(allowed_roles: list):
                 detail="Operation not permitted"
             )
         return user
-    return check_role 
\ No newline at end of file
+    return check_role
@@ -0,0 +1,11 @@
+"""
+In-process service catalog and the indexes built over it.
+"""
+
+from .store import CatalogStore, catalog
+from .titles import TitleIndex, normalize_title, title_index
+from .prices import PriceIndex, price_index
+from .providers import ProviderCategoryIndex, provider_categories
+from .facets import FacetIndex, facet_index
+from .listing import ListingIndex, listing_index
+from .search import SearchIndex, search_index, stem, tokenize
@@ -0,0 +1,99 @@
+"""
+Facet counts over the active service catalog.
+
+The catalog is mirrored as a columnar view (a category code and a price
+per service, as numpy arrays) built on first use after a change, so a
+facet query is a few vectorized passes instead of a loop over service
+dicts. Facets are disjunctive: each one applies every filter except its
+own, so the category counts ignore the selected category and the price
+histogram ignores the selected price range, letting the browse UI show
+the alternatives to the current selection.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .store import catalog
+
+class FacetIndex:
+    def __init__(self):
+        self._services: Dict[str, Tuple[Optional[str], Optional[float]]] = {}
+        # (category names, category codes, prices), rebuilt after writes
+        self._view: Optional[Tuple[List[Optional[str]], np.ndarray, np.ndarray]] = None
+
+    def reset(self, services: Iterable[Dict[str, Any]]) -> None:
+        self._services = {s["id"]: (s.get("category"), s.get("price")) for s in services}
+        self._view = None
+
+    def add(self, service: Dict[str, Any]) -> None:
+        self._services[service["id"]] = (service.get("category"), service.get("price"))
+        self._view = None
+
+    def discard(self, service: Dict[str, Any]) -> None:
+        if self._services.pop(service["id"], None) is not None:
+            self._view = None
+
+    def _get_view(self) -> Tuple[List[Optional[str]], np.ndarray, np.ndarray]:
+        if self._view is None:
+            codes_by_name: Dict[Optional[str], int] = {}
+            codes = np.empty(len(self._services), dtype=np.int32)
+            prices = np.empty(len(self._services), dtype=float)
+            for i, (category, price) in enumerate(self._services.values()):
+                codes[i] = codes_by_name.setdefault(category, len(codes_by_name))
+                prices[i] = np.nan if price is None else price
+            self._view = (list(codes_by_name), codes, prices)
+        return self._view
+
+    def facets(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        buckets: int = 10
+    ) -> Dict[str, Any]:
+        """Total, category counts and price histogram for a filter set"""
+        names, codes, prices = self._get_view()
+
+        has_price = ~np.isnan(prices)
+        # Services without a price only match when no price filter is set
+        in_price = np.ones(len(prices), dtype=bool)
+        if min_price is not None:
+            in_price &= has_price & (prices >= min_price)
+        if max_price is not None:
+            in_price &= has_price & (prices <= max_price)
+
+        if category is None:
+            in_category = np.ones(len(codes), dtype=bool)
+        elif category in names:
+            in_category = codes == names.index(category)
+        else:
+            in_category = np.zeros(len(codes), dtype=bool)
+
+        counts = np.bincount(codes[in_price], minlength=len(names))
+        categories = sorted(
+            ({"category": name, "count": int(count)} for name, count in zip(names, counts) if count),
+            key=lambda c: (-c["count"], str(c["category"]))
+        )
+
+        # Equal-width buckets between the cheapest and dearest matching service
+        category_prices = prices[in_category & has_price]
+        price_buckets = []
+        if len(category_prices):
+            histogram, edges = np.histogram(category_prices, bins=buckets)
+            price_buckets = [
+                {"min": round(float(edges[i]), 2), "max": round(float(edges[i + 1]), 2), "count": int(count)}
+                for i, count in enumerate(histogram)
+            ]
+
+        return {
+            "total": int(np.count_nonzero(in_category & in_price)),
+            "categories": categories,
+            "price_buckets": price_buckets,
+        }
+
+    def __len__(self) -> int:
+        return len(self._services)
+
+facet_index = FacetIndex()
+catalog.register(facet_index)
@@ -0,0 +1,76 @@
+"""
+Newest-first listing of the active service catalog.
+
+Services are kept sorted on (created_at, id), the order of the keyset
+paginated list endpoints, so a filtered page is read off the sorted list
+by walking back from the cursor instead of querying the database. Pages
+have the repositories' shape: up to limit + 1 rows, the extra one only
+telling that another page follows.
+"""
+
+import bisect
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from core.pagination import Cursor, cursor_key
+from .store import catalog
+
+class ListingIndex:
+    def __init__(self):
+        # (created_at, id), ascending
+        self._keys: List[Tuple[datetime, str]] = []
+        self._services: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _key(service: Dict[str, Any]) -> Tuple[datetime, str]:
+        return cursor_key(service.get("created_at"), service["id"])
+
+    def reset(self, services: Iterable[Dict[str, Any]]) -> None:
+        self._services = {s["id"]: s for s in services}
+        self._keys = sorted(self._key(s) for s in self._services.values())
+
+    def add(self, service: Dict[str, Any]) -> None:
+        self._services[service["id"]] = service
+        bisect.insort(self._keys, self._key(service))
+
+    def discard(self, service: Dict[str, Any]) -> None:
+        if self._services.pop(service["id"], None) is None:
+            return
+        key = self._key(service)
+        i = bisect.bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            del self._keys[i]
+
+    def page(
+        self,
+        after: Optional[Cursor] = None,
+        limit: int = 100,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        provider_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Matching services older than the cursor, newest first, with one look-ahead row"""
+        end = len(self._keys) if after is None else bisect.bisect_left(self._keys, cursor_key(*after))
+        page = []
+        for i in range(end - 1, -1, -1):
+            service = self._services[self._keys[i][1]]
+            if provider_id and service.get("provider_id") != provider_id:
+                continue
+            if category and service.get("category") != category:
+                continue
+            price = service.get("price")
+            if min_price is not None and (price is None or price < min_price):
+                continue
+            if max_price is not None and (price is None or price > max_price):
+                continue
+            page.append(service)
+            if len(page) > limit:
+                break
+        return page
+
+    def __len__(self) -> int:
+        return len(self._services)
+
+listing_index = ListingIndex()
+catalog.register(listing_index)
@@ -0,0 +1,63 @@
+"""
+Per-category price summaries over the active service catalog.
+
+Each category keeps its prices in a sorted list, updated with bisect as
+services are added and removed, so min, max, count and median are read
+off the list without scanning the catalog.
+"""
+
+import bisect
+from typing import Any, Dict, Iterable, List, Optional
+
+from .store import catalog
+
+class PriceIndex:
+    def __init__(self):
+        self._prices: Dict[str, List[float]] = {}
+
+    def reset(self, services: Iterable[Dict[str, Any]]) -> None:
+        prices: Dict[str, List[float]] = {}
+        for service in services:
+            if service.get("price") is not None:
+                prices.setdefault(service.get("category"), []).append(service["price"])
+        for values in prices.values():
+            values.sort()
+        self._prices = prices
+
+    def add(self, service: Dict[str, Any]) -> None:
+        if service.get("price") is None:
+            return
+        bisect.insort(self._prices.setdefault(service.get("category"), []), service["price"])
+
+    def discard(self, service: Dict[str, Any]) -> None:
+        values = self._prices.get(service.get("category"))
+        if not values or service.get("price") is None:
+            return
+        i = bisect.bisect_left(values, service["price"])
+        if i < len(values) and values[i] == service["price"]:
+            del values[i]
+        if not values:
+            del self._prices[service.get("category")]
+
+    def summary(self, category: str) -> Optional[Dict[str, Any]]:
+        """Price range of the active services in a category"""
+        values = self._prices.get(category)
+        if not values:
+            return None
+
+        count = len(values)
+        mid = count // 2
+        median = values[mid] if count % 2 else (values[mid - 1] + values[mid]) / 2
+        return {
+            "category": category,
+            "count": count,
+            "min": values[0],
+            "max": values[-1],
+            "median": median,
+        }
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        return [self.summary(c) for c in sorted(self._prices, key=str)]
+
+price_index = PriceIndex()
+catalog.register(price_index)
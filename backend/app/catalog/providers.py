@@ -0,0 +1,59 @@
+"""
+Providers offering each category of the active service catalog.
+
+Each category counts the active services per provider, so a provider
+stays listed until their last service in the category goes away. The
+active services of each provider are kept too, for listings that show a
+provider with what they offer.
+"""
+
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Set
+
+from .store import catalog
+
+class ProviderCategoryIndex:
+    def __init__(self):
+        self._providers: Dict[str, Counter] = {}
+        # provider_id -> {service_id: service}
+        self._services: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def reset(self, services: Iterable[Dict[str, Any]]) -> None:
+        self.__init__()
+        for service in services:
+            self.add(service)
+
+    def add(self, service: Dict[str, Any]) -> None:
+        self._providers.setdefault(service.get("category"), Counter())[service["provider_id"]] += 1
+        self._services.setdefault(service["provider_id"], {})[service["id"]] = service
+
+    def discard(self, service: Dict[str, Any]) -> None:
+        offered = self._services.get(service["provider_id"])
+        if offered is not None:
+            offered.pop(service["id"], None)
+            if not offered:
+                del self._services[service["provider_id"]]
+
+        counts = self._providers.get(service.get("category"))
+        if not counts or not counts[service["provider_id"]]:
+            return
+        counts[service["provider_id"]] -= 1
+        if counts[service["provider_id"]] <= 0:
+            del counts[service["provider_id"]]
+        if not counts:
+            del self._providers[service.get("category")]
+
+    def providers(self, category: str) -> Set[str]:
+        """IDs of the providers with an active service in a category"""
+        return set(self._providers.get(category, ()))
+
+    def all_providers(self) -> Set[str]:
+        """IDs of the providers with any active service"""
+        return set(self._services)
+
+    def services(self, provider_id: str) -> List[Dict[str, Any]]:
+        """Active services of a provider"""
+        return list(self._services.get(provider_id, {}).values())
+
+provider_categories = ProviderCategoryIndex()
+catalog.register(provider_categories)
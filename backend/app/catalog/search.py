@@ -0,0 +1,210 @@
+"""
+Ranked full-text search over the active service catalog.
+
+Titles and descriptions are tokenized (accents folded, case-folded, split
+on non-alphanumerics, stop words dropped) and stemmed with a light suffix
+stripper, so "cleaning", "cleaner" and "cleans" all index as "clean". An
+inverted index maps each term to the services containing it with their
+term frequencies; title terms count TITLE_WEIGHT times. Queries are scored
+with BM25. The vocabulary is also kept sorted, so the last word of a query
+can be completed by prefix with two bisects (for search-as-you-type).
+"""
+
+import bisect
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .store import catalog
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# A title term counts as much as this many description terms
+TITLE_WEIGHT = 3
+# Score multiplier and cap for terms matched only by prefix
+PREFIX_WEIGHT = 0.5
+MAX_PREFIX_TERMS = 50
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have i in is it its of on or our "
+    "the this to we with you your".split()
+)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def _fold(text: str) -> str:
+    """Case-fold and strip accents ("Réno" -> "reno")"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+def stem(word: str) -> str:
+    """Strip common English inflections, keeping at least three letters"""
+    if len(word) <= 3 or word.isdigit():
+        return word
+
+    if word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+
+    for suffix, replacement in (("ation", "at"), ("ing", ""), ("ed", ""), ("er", ""), ("ly", "")):
+        if word.endswith(suffix):
+            stripped = word[:-len(suffix)] + replacement
+            if len(stripped) >= 3 and any(c in "aeiouy" for c in stripped):
+                word = stripped
+                # "running" -> "runn" -> "run"
+                if len(word) > 3 and word[-1] == word[-2] and word[-1] not in "aeioulsz":
+                    word = word[:-1]
+            break
+
+    if word.endswith("e") and len(word) > 3:
+        word = word[:-1]
+    return word
+
+def words(text: Optional[str]) -> List[str]:
+    """Folded tokens of a text, without stop words"""
+    return [t for t in TOKEN_PATTERN.findall(_fold(text or "")) if t not in STOP_WORDS]
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return [stem(t) for t in words(text)]
+
+class SearchIndex:
+    def __init__(self):
+        # term -> {service_id: weighted term frequency}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        # Sorted vocabulary for prefix matching
+        self._terms: List[str] = []
+        self._terms_of: Dict[str, Counter] = {}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self._services: Dict[str, Dict[str, Any]] = {}
+        # BM25 length normalization per service, rebuilt after writes
+        self._norms: Optional[Dict[str, float]] = None
+
+    def reset(self, services: Iterable[Dict[str, Any]]) -> None:
+        self.__init__()
+        for service in services:
+            self.add(service)
+
+    def _document_terms(self, service: Dict[str, Any]) -> Counter:
+        terms = Counter(tokenize(service.get("description")))
+        for term in tokenize(service.get("title")):
+            terms[term] += TITLE_WEIGHT
+        return terms
+
+    def add(self, service: Dict[str, Any]) -> None:
+        service_id = service["id"]
+        if service_id in self._services:
+            self.discard(self._services[service_id])
+
+        terms = self._document_terms(service)
+        self._norms = None
+        self._services[service_id] = service
+        self._terms_of[service_id] = terms
+        self._lengths[service_id] = sum(terms.values())
+        self._total_length += self._lengths[service_id]
+
+        for term, frequency in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                bisect.insort(self._terms, term)
+            postings[service_id] = frequency
+
+    def discard(self, service: Dict[str, Any]) -> None:
+        service_id = service["id"]
+        terms = self._terms_of.pop(service_id, None)
+        if terms is None:
+            return
+        del self._services[service_id]
+        self._total_length -= self._lengths.pop(service_id)
+        self._norms = None
+
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(service_id, None)
+            if not postings:
+                del self._postings[term]
+                i = bisect.bisect_left(self._terms, term)
+                if i < len(self._terms) and self._terms[i] == term:
+                    del self._terms[i]
+
+    def _completions(self, prefix: str) -> List[str]:
+        """Vocabulary terms starting with a prefix, most widely used first"""
+        lo = bisect.bisect_left(self._terms, prefix)
+        hi = bisect.bisect_left(self._terms, prefix + "\uffff")
+        terms = self._terms[lo:hi]
+        if len(terms) > MAX_PREFIX_TERMS:
+            terms = heapq.nlargest(MAX_PREFIX_TERMS, terms, key=lambda t: len(self._postings[t]))
+        return terms
+
+    def _get_norms(self) -> Dict[str, float]:
+        if self._norms is None:
+            average_length = self._total_length / len(self._services) or 1
+            self._norms = {
+                service_id: K1 * (1 - B + B * length / average_length)
+                for service_id, length in self._lengths.items()
+            }
+        return self._norms
+
+    def _query_terms(self, query: str, prefix: bool) -> Dict[str, float]:
+        """Terms to score with their weights"""
+        query_words = words(query)
+        weights: Dict[str, float] = {}
+        for word in query_words:
+            weights[stem(word)] = 1.0
+
+        # Complete the word still being typed
+        if prefix and query_words and not query[-1].isspace():
+            last = query_words[-1]
+            for term in self._completions(last) + self._completions(stem(last)):
+                weights.setdefault(term, PREFIX_WEIGHT)
+        return weights
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        category: Optional[str] = None,
+        prefix: bool = True
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """Services matching a query, best first, with their BM25 scores"""
+        count = len(self._services)
+        if not count:
+            return []
+        norms = self._get_norms()
+
+        scores: Dict[str, float] = {}
+        for term, weight in self._query_terms(query, prefix).items():
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            boost = weight * idf * (K1 + 1)
+            get = scores.get
+            for service_id, frequency in postings.items():
+                scores[service_id] = get(service_id, 0.0) + boost * frequency / (frequency + norms[service_id])
+
+        if category:
+            scores = {i: s for i, s in scores.items() if self._services[i].get("category") == category}
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+        return [(self._services[service_id], score) for service_id, score in best]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"services": len(self._services), "terms": len(self._terms)}
+
+    def __len__(self) -> int:
+        return len(self._services)
+
+search_index = SearchIndex()
+catalog.register(search_index)
@@ -0,0 +1,88 @@
+"""
+In-process copy of the active service catalog.
+
+The catalog is a ReloadingSnapshot of the active services: loaded on
+first use, reloaded in the background once older than CATALOG_TTL
+seconds, and updated immediately by writes made through this process with
+upsert()/remove(). Indexes register with the store and are kept in step
+with it through reset()/add()/discard().
+"""
+
+from typing import Any, Dict, List, Optional
+
+from postgrest import AsyncPostgrestClient
+from core.config import CATALOG_TTL
+from core.snapshot import ReloadingSnapshot
+from repositories import services as services_repo
+
+class CatalogStore(ReloadingSnapshot):
+    name = "service catalog"
+
+    def __init__(self, ttl: float):
+        super().__init__(ttl)
+        self._services: Dict[str, Dict[str, Any]] = {}
+        self._indexes: List[Any] = []
+        # Bumped on every change so readers can tell when the catalog moved
+        self.version = 0
+
+    def register(self, index: Any) -> None:
+        """Keep an index in step with the catalog"""
+        self._indexes.append(index)
+        if self.loaded:
+            index.reset(list(self._services.values()))
+
+    async def fetch_page(self, db: AsyncPostgrestClient, after, limit: int) -> List[Dict[str, Any]]:
+        return await services_repo.list_services(db, is_active=True, after=after, limit=limit)
+
+    def install(self, rows: Dict[str, Dict[str, Any]]) -> None:
+        self._services = rows
+        services = list(rows.values())
+        for index in self._indexes:
+            index.reset(services)
+        self.version += 1
+
+    def upsert(self, service: Optional[Dict[str, Any]]) -> None:
+        """Apply a created or updated service row (inactive ones are dropped)"""
+        if not service:
+            return
+        self.version += 1
+        self._record(service["id"], service if service.get("is_active") else None)
+        if not self.loaded:
+            return
+
+        previous = self._services.pop(service["id"], None)
+        if previous is not None:
+            for index in self._indexes:
+                index.discard(previous)
+
+        if service.get("is_active"):
+            self._services[service["id"]] = service
+            for index in self._indexes:
+                index.add(service)
+
+    def remove(self, service_id: str) -> None:
+        """Drop a deleted service"""
+        self.version += 1
+        self._record(service_id, None)
+        previous = self._services.pop(service_id, None)
+        if previous is not None:
+            for index in self._indexes:
+                index.discard(previous)
+
+    def get(self, service_id: str) -> Optional[Dict[str, Any]]:
+        return self._services.get(service_id)
+
+    def services(self) -> List[Dict[str, Any]]:
+        return list(self._services.values())
+
+    def __len__(self) -> int:
+        return len(self._services)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "services": len(self._services),
+            "version": self.version,
+            **super().stats(),
+        }
+
+catalog = CatalogStore(CATALOG_TTL)
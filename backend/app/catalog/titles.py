@@ -0,0 +1,125 @@
+"""
+Title index over the active service catalog.
+
+Titles are normalized (case-folded, whitespace collapsed) into an exact
+map, plus a trigram index used to find titles containing a query without
+scanning the catalog. Lookups follow the by-title endpoint's rules: an
+exact match first, then a title containing the query, then the longest
+title contained in the query.
+"""
+
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from .store import catalog
+
+def normalize_title(title: str) -> str:
+    return " ".join(title.casefold().split())
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class TitleIndex:
+    def __init__(self):
+        self._exact: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._titles: Dict[str, str] = {}
+        self._services: Dict[str, Dict[str, Any]] = {}
+        # Title lengths, so queries longer than every title skip the exact and containing steps
+        self._lengths: Counter = Counter()
+        # Insertion order, so ties resolve to the earliest loaded service
+        self._order: Dict[str, int] = {}
+        self._next = 0
+
+    def reset(self, services: Iterable[Dict[str, Any]]) -> None:
+        self.__init__()
+        for service in services:
+            self.add(service)
+
+    def add(self, service: Dict[str, Any]) -> None:
+        service_id = service["id"]
+        title = normalize_title(service.get("title") or "")
+        self._titles[service_id] = title
+        self._services[service_id] = service
+        self._lengths[len(title)] += 1
+        self._order[service_id] = self._next
+        self._next += 1
+
+        self._exact.setdefault(title, {})[service_id] = service
+        for gram in _trigrams(title):
+            self._trigrams.setdefault(gram, set()).add(service_id)
+
+    def discard(self, service: Dict[str, Any]) -> None:
+        service_id = service["id"]
+        title = self._titles.pop(service_id, None)
+        if title is None:
+            return
+        del self._services[service_id]
+        del self._order[service_id]
+        self._lengths[len(title)] -= 1
+        if not self._lengths[len(title)]:
+            del self._lengths[len(title)]
+
+        matches = self._exact.get(title)
+        if matches is not None:
+            matches.pop(service_id, None)
+            if not matches:
+                del self._exact[title]
+        for gram in _trigrams(title):
+            ids = self._trigrams.get(gram)
+            if ids is not None:
+                ids.discard(service_id)
+                if not ids:
+                    del self._trigrams[gram]
+
+    def _containing(self, query: str) -> List[str]:
+        """IDs of services whose title contains the query"""
+        if len(query) < 3:
+            return [i for i, t in self._titles.items() if query in t]
+
+        postings = sorted((self._trigrams.get(g, set()) for g in _trigrams(query)), key=len)
+        candidates = set.intersection(*postings) if postings else set()
+        # Trigrams only narrow the set down; confirm the actual substring
+        return [i for i in candidates if query in self._titles[i]]
+
+    def _contained_in(self, query: str) -> Optional[Dict[str, Any]]:
+        """The service with the longest title that is a substring of the query"""
+        best = None
+        best_key = None
+        # One substring test per distinct title: O(titles x query length)
+        for title, matches in self._exact.items():
+            if not title or len(title) > len(query) or title not in query:
+                continue
+            service = min(matches.values(), key=lambda s: self._order[s["id"]])
+            key = (-len(title), self._order[service["id"]])
+            if best_key is None or key < best_key:
+                best, best_key = service, key
+        return best
+
+    def max_length(self) -> int:
+        """Length of the longest indexed title"""
+        return max(self._lengths, default=0)
+
+    def lookup(self, title: str) -> Optional[Dict[str, Any]]:
+        """Find the service best matching a title"""
+        query = normalize_title(title)
+        if not query:
+            return None
+
+        # A query longer than every title can only contain titles
+        if len(query) <= self.max_length():
+            exact = self._exact.get(query)
+            if exact:
+                return next(iter(exact.values()))
+
+            containing = self._containing(query)
+            if containing:
+                return self._services[min(containing, key=self._order.__getitem__)]
+
+        return self._contained_in(query)
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+title_index = TitleIndex()
+catalog.register(title_index)
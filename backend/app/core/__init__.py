@@ -1,4 +1,4 @@
 from .config import settings
-from .supabase import get_supabase
+from .supabase import get_supabase, get_db, get_auth
 
-__all__ = ['settings', 'get_supabase']
+__all__ = ['settings', 'get_supabase', 'get_db', 'get_auth']
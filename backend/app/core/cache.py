@@ -0,0 +1,119 @@
+"""
+Small in-process caches shared by the routers.
+
+TTLCache is a bounded LRU map whose entries also expire, either after the
+cache-wide ttl or at an absolute time given per entry. ExpiringSet holds
+keys until their own expiry time and is never trimmed early, for data
+that must not be forgotten under memory pressure. Neither is
+thread-safe; all callers run on the event loop.
+"""
+
+import heapq
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: Optional[float] = None,
+        expires_at: Optional[float] = None
+    ) -> None:
+        """Store a value; expires_at (epoch seconds) overrides the ttl"""
+        if expires_at is None:
+            ttl = self.ttl if ttl is None else ttl
+            expires_at = time.time() + ttl if ttl is not None else None
+
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> Any:
+        entry = self._data.pop(key, None)
+        return entry[0] if entry else None
+
+    def pop_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Drop every entry for which predicate(key, value) is true"""
+        keys = [k for k, (v, _) in self._data.items() if predicate(k, v)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+class ExpiringSet:
+    """Keys kept until their expiry time; its size is bounded only by what is still live"""
+
+    def __init__(self):
+        self._expiry: Dict[Hashable, float] = {}
+        # (expires_at, key), oldest first, for pruning
+        self._heap: list = []
+
+    def _prune(self) -> None:
+        now = time.time()
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._heap)
+            # Skip heap entries superseded by a later add()
+            if self._expiry.get(key) == expires_at:
+                del self._expiry[key]
+
+    def add(self, key: Hashable, expires_at: float) -> None:
+        self._prune()
+        if expires_at <= time.time() or self._expiry.get(key, 0) >= expires_at:
+            return
+        self._expiry[key] = expires_at
+        heapq.heappush(self._heap, (expires_at, key))
+
+    def __contains__(self, key: Hashable) -> bool:
+        expires_at = self._expiry.get(key)
+        return expires_at is not None and expires_at > time.time()
+
+    def __len__(self) -> int:
+        self._prune()
+        return len(self._expiry)
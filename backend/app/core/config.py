@@ -7,6 +7,7 @@ for the entire application. Settings can be imported as:
 """
 
 import os
+from typing import Optional
 from dotenv import load_dotenv
 from pydantic import BaseSettings
 
@@ -16,6 +17,64 @@ load_dotenv()
 # Supabase configuration
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+# Service role key, only for the few RPCs that anon and authenticated may not call
+SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+# Supabase HTTP connection pool configuration
+SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "100"))
+SUPABASE_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("SUPABASE_MAX_KEEPALIVE_CONNECTIONS", "20"))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30"))
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+
+# Auth configuration
+# HS256 secret used by Supabase projects that sign access tokens symmetrically
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET") or os.getenv("JWT_SECRET")
+# JWKS endpoint for asymmetric (RS256/ES256) access tokens and how long its keys are cached
+SUPABASE_JWKS_URL = os.getenv("SUPABASE_JWKS_URL", f"{SUPABASE_URL}/auth/v1/jwks")
+JWKS_CACHE_TTL = float(os.getenv("JWKS_CACHE_TTL", "600"))
+JWKS_MIN_REFRESH_INTERVAL = float(os.getenv("JWKS_MIN_REFRESH_INTERVAL", "30"))
+# Maximum number of verified access tokens kept in memory
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+# When enabled, locally verified tokens are also checked against Supabase Auth (catches revoked sessions)
+AUTH_REMOTE_CHECK = os.getenv("AUTH_REMOTE_CHECK", "false").lower() in ("1", "true", "yes")
+
+# In-process cache of user profiles used for role checks
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+
+# In-process catalog of active services, reloaded from Supabase after this many seconds
+CATALOG_TTL = float(os.getenv("CATALOG_TTL", "300"))
+
+# Read-through cache of service queries, invalidated on service writes
+
+# Compiled provider availability and booked intervals used by the slot engine
+SLOT_CACHE_TTL = float(os.getenv("SLOT_CACHE_TTL", "300"))
+SLOT_CACHE_SIZE = int(os.getenv("SLOT_CACHE_SIZE", "1000"))
+# IANA timezone of availability windows for providers whose profile sets none
+PROVIDER_TIMEZONE = os.getenv("PROVIDER_TIMEZONE", "America/Toronto")
+
+# Keyset pagination of list endpoints
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "100"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "500"))
+
+# Rows per insert of bulk imports and per page of streamed exports
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "200"))
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+# Failed rows an import reports individually; the rest are only counted
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "100"))
+# Longest line an import reads; longer ones are dropped as they stream in and reported
+IMPORT_MAX_LINE_BYTES = int(os.getenv("IMPORT_MAX_LINE_BYTES", "65536"))
+
+# Postal code (FSA) centroids used to geocode providers, a CSV of fsa,latitude,longitude
+POSTAL_CENTROIDS_PATH = os.getenv(
+    "POSTAL_CENTROIDS_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "geo", "data", "fsa_centroids.csv")
+)
+# Largest radius a proximity search may use
+NEARBY_MAX_RADIUS_KM = float(os.getenv("NEARBY_MAX_RADIUS_KM", "100"))
+
+# Responses smaller than this many bytes are sent uncompressed
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1000"))
 
 # Frontend configuration
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
@@ -38,6 +97,32 @@ class Settings(BaseSettings):
     API_V1_STR: str = API_PREFIX
     SUPABASE_URL: str = SUPABASE_URL
     SUPABASE_KEY: str = SUPABASE_KEY
+    SUPABASE_SERVICE_ROLE_KEY: Optional[str] = SUPABASE_SERVICE_ROLE_KEY
+    SUPABASE_MAX_CONNECTIONS: int = SUPABASE_MAX_CONNECTIONS
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS: int = SUPABASE_MAX_KEEPALIVE_CONNECTIONS
+    SUPABASE_KEEPALIVE_EXPIRY: float = SUPABASE_KEEPALIVE_EXPIRY
+    SUPABASE_TIMEOUT: float = SUPABASE_TIMEOUT
+    SUPABASE_JWT_SECRET: Optional[str] = SUPABASE_JWT_SECRET
+    SUPABASE_JWKS_URL: str = SUPABASE_JWKS_URL
+    JWKS_CACHE_TTL: float = JWKS_CACHE_TTL
+    JWKS_MIN_REFRESH_INTERVAL: float = JWKS_MIN_REFRESH_INTERVAL
+    TOKEN_CACHE_SIZE: int = TOKEN_CACHE_SIZE
+    AUTH_REMOTE_CHECK: bool = AUTH_REMOTE_CHECK
+    USER_CACHE_TTL: float = USER_CACHE_TTL
+    USER_CACHE_SIZE: int = USER_CACHE_SIZE
+    CATALOG_TTL: float = CATALOG_TTL
+    SLOT_CACHE_TTL: float = SLOT_CACHE_TTL
+    SLOT_CACHE_SIZE: int = SLOT_CACHE_SIZE
+    PROVIDER_TIMEZONE: str = PROVIDER_TIMEZONE
+    PAGE_SIZE_DEFAULT: int = PAGE_SIZE_DEFAULT
+    PAGE_SIZE_MAX: int = PAGE_SIZE_MAX
+    IMPORT_BATCH_SIZE: int = IMPORT_BATCH_SIZE
+    EXPORT_PAGE_SIZE: int = EXPORT_PAGE_SIZE
+    IMPORT_MAX_ERRORS: int = IMPORT_MAX_ERRORS
+    IMPORT_MAX_LINE_BYTES: int = IMPORT_MAX_LINE_BYTES
+    POSTAL_CENTROIDS_PATH: str = POSTAL_CENTROIDS_PATH
+    NEARBY_MAX_RADIUS_KM: float = NEARBY_MAX_RADIUS_KM
+    GZIP_MIN_SIZE: int = GZIP_MIN_SIZE
     FRONTEND_URL: str = FRONTEND_URL
 
     class Config:
@@ -0,0 +1,50 @@
+"""
+Conditional GET support.
+
+ETagRoute is a route class for routers serving public, frequently
+re-fetched data. Successful GET responses get a strong ETag (a hash of the
+body) and `Cache-Control: no-cache`, so browsers revalidate with
+If-None-Match and receive an empty 304 when nothing changed.
+"""
+
+import hashlib
+from typing import Callable
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check an If-None-Match header against an ETag"""
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as RFC 7232 requires for If-None-Match
+    return "*" in tags or any(tag.replace("W/", "", 1) == etag for tag in tags)
+
+class ETagRoute(APIRoute):
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def etag_handler(request: Request) -> Response:
+            response = await handler(request)
+
+            # Streaming responses have no body to hash
+            body = getattr(response, "body", None)
+            if request.method != "GET" or response.status_code != 200 or body is None:
+                return response
+
+            etag = make_etag(body)
+            response.headers["ETag"] = etag
+            response.headers.setdefault("Cache-Control", "no-cache")
+
+            if etag_matches(request.headers.get("if-none-match", ""), etag):
+                headers = {
+                    k: v for k, v in response.headers.items()
+                    if k.lower() not in ("content-length", "content-type")
+                }
+                return Response(status_code=304, headers=headers)
+
+            return response
+
+        return etag_handler
@@ -0,0 +1,76 @@
+"""
+Keyset (cursor) pagination for the list endpoints.
+
+Lists are ordered newest first on (created_at, id). A page is fetched
+with one extra row to tell whether another page follows, and the cursor
+for the next page is the (created_at, id) of the last row returned,
+base64-encoded so clients treat it as opaque. The cursor travels in the
+X-Next-Cursor response header so list bodies stay plain JSON arrays.
+Decoded cursors are parsed as a timestamp and a UUID and re-serialized
+before they reach a filter, so a crafted one cannot inject filter syntax.
+"""
+
+import base64
+import binascii
+import json
+import re
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+Cursor = Tuple[str, str]
+
+# Postgres trims trailing zeros of fractional seconds; fromisoformat wants 3 or 6 digits
+FRACTION_PATTERN = re.compile(r"\.(\d{1,6})\d*")
+
+def _parse_timestamp(value: str) -> datetime:
+    value = value.strip().replace("Z", "+00:00")
+    value = FRACTION_PATTERN.sub(lambda m: "." + m.group(1).ljust(6, "0"), value, count=1)
+    return datetime.fromisoformat(value)
+
+def cursor_key(created_at: Any, row_id: Any) -> Tuple[datetime, str]:
+    """Sort key of a row in list order, for pages served from memory"""
+    try:
+        parsed = _parse_timestamp(str(created_at))
+    except ValueError:
+        parsed = datetime.min
+    return (parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc), str(row_id))
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    raw = json.dumps([str(row["created_at"]), str(row["id"])], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Cursor]:
+    """Decode a cursor from a query string, rejecting anything we did not issue"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return _parse_timestamp(created_at).isoformat(), str(uuid.UUID(row_id))
+    except (binascii.Error, ValueError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset(query, after: Optional[Cursor], limit: int):
+    """Order a PostgREST query for keyset pagination and start it after a cursor"""
+    if after:
+        created_at, row_id = after
+        # Values are quoted since timestamps contain reserved characters
+        query.params = query.params.add(
+            "or",
+            f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{row_id}"))'
+        )
+    # Both sort keys go in one order param; PostgREST only reads one
+    query.params = query.params.add("order", "created_at.desc,id.desc")
+    return query.limit(limit + 1)
+
+def paginate(rows: List[Dict[str, Any]], limit: int, response: Response) -> List[Dict[str, Any]]:
+    """Trim the look-ahead row and set the next-page cursor header"""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1])
+    return rows
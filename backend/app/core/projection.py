@@ -0,0 +1,20 @@
+"""
+Column projection for PostgREST selects.
+
+Instead of select("*"), queries ask only for the columns the response
+model will keep, derived from the model's fields (by alias) plus any
+extra columns the caller needs, such as pagination keys.
+"""
+
+from functools import lru_cache
+from typing import Type
+
+from pydantic import BaseModel
+
+@lru_cache(maxsize=None)
+def columns(model: Type[BaseModel], *extra: str) -> str:
+    """Comma-separated select list for a response model's fields"""
+    names = [field.alias for field in model.__fields__.values()]
+    names.extend(extra)
+    # Keep the first occurrence of each column in model order
+    return ",".join(dict.fromkeys(names))
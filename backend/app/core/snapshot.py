@@ -0,0 +1,131 @@
+"""
+In-process snapshots of Supabase tables.
+
+A snapshot is loaded on first use and reloaded in the background once it
+is older than its TTL, serving the stale copy meanwhile (so writes made by
+other workers show up eventually). Loads page through the table, since
+PostgREST caps the rows of a single response. Writes made through this
+process are applied to the snapshot immediately by the subclass and
+recorded with _record(); those that land while a load is in flight are
+replayed over the rows it read, so a reload never brings back a stale copy.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from postgrest import AsyncPostgrestClient
+from .config import PAGE_SIZE_MAX
+from .streaming import iter_pages, keyset_cursor
+
+logger = logging.getLogger(__name__)
+
+class LazyLock:
+    """An asyncio.Lock created on first use, so it binds to the server's running event loop"""
+
+    def __init__(self):
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def __aenter__(self) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        await self._lock.acquire()
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._lock.release()
+
+class ReloadingSnapshot:
+    # Shown in reload failure logs
+    name = "snapshot"
+    page_size = PAGE_SIZE_MAX
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._loaded_at = 0.0
+        self._lock = LazyLock()
+        self._stale_reload: Optional[asyncio.Task] = None
+        # Writes made while a load is in flight (None marks a removal)
+        self._pending: Optional[Dict[str, Optional[Dict[str, Any]]]] = None
+        self.loads = 0
+
+    async def fetch_page(self, db: AsyncPostgrestClient, after: Optional[Any], limit: int) -> List[Dict[str, Any]]:
+        """One page of up to limit + 1 rows after a cursor"""
+        raise NotImplementedError
+
+    def cursor(self, row: Dict[str, Any]) -> Any:
+        """The cursor that resumes a load after a row"""
+        return keyset_cursor(row)
+
+    def key(self, row: Dict[str, Any]) -> str:
+        return row["id"]
+
+    def install(self, rows: Dict[str, Dict[str, Any]]) -> None:
+        """Replace the snapshot with freshly loaded rows, by key"""
+        raise NotImplementedError
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at > 0
+
+    def _age(self) -> float:
+        return time.monotonic() - self._loaded_at
+
+    def _record(self, key: str, row: Optional[Dict[str, Any]]) -> None:
+        """Note a write (None for a removal) so a load in flight replays it"""
+        if self._pending is not None:
+            self._pending[key] = row
+
+    async def load(self, db: AsyncPostgrestClient) -> None:
+        """Reload every row from the database"""
+        seen_load = self._loaded_at
+        async with self._lock:
+            # Another caller reloaded while we were waiting for the lock
+            if self._loaded_at != seen_load:
+                return
+
+            self._pending = {}
+            try:
+                loaded = {}
+
+                async def fetch_page(after, limit):
+                    return await self.fetch_page(db, after, limit)
+
+                async for page in iter_pages(fetch_page, self.page_size, self.cursor):
+                    loaded.update((self.key(row), row) for row in page)
+                pending = self._pending
+            finally:
+                self._pending = None
+
+            # Replay writes that raced with the load over the rows it read
+            for key, row in pending.items():
+                loaded.pop(key, None)
+                if row is not None:
+                    loaded[key] = row
+
+            self.install(loaded)
+            self._loaded_at = time.monotonic()
+            self.loads += 1
+
+    async def ensure_loaded(self, db: AsyncPostgrestClient) -> None:
+        """Load the snapshot if needed; a stale one is served while it reloads"""
+        if not self.loaded:
+            await self.load(db)
+        elif self._age() > self.ttl:
+            self._schedule_reload(db)
+
+    def _schedule_reload(self, db: AsyncPostgrestClient) -> None:
+        if self._stale_reload is None or self._stale_reload.done():
+            self._stale_reload = asyncio.create_task(self._reload_quietly(db))
+
+    async def _reload_quietly(self, db: AsyncPostgrestClient) -> None:
+        try:
+            await self.load(db)
+        except Exception as e:
+            logger.warning(f"Failed to reload the {self.name}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loads": self.loads,
+            "age_seconds": round(self._age(), 1) if self.loaded else None,
+        }
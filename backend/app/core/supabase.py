@@ -1,8 +1,174 @@
+from typing import AsyncIterator, Optional
+
+import httpx
+from fastapi import HTTPException
+from gotrue import AsyncGoTrueClient
+from gotrue.constants import DEFAULT_HEADERS as GOTRUE_DEFAULT_HEADERS
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
+from postgrest.utils import SyncClient
 from supabase import create_client, Client
-from .config import SUPABASE_URL, SUPABASE_KEY
+from supabase.lib.client_options import ClientOptions
+from .config import (
+    SUPABASE_URL,
+    SUPABASE_KEY,
+    SUPABASE_SERVICE_ROLE_KEY,
+    SUPABASE_MAX_CONNECTIONS,
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+    SUPABASE_KEEPALIVE_EXPIRY,
+    SUPABASE_TIMEOUT,
+)
 
-def get_supabase() -> Client:
-    """Get a Supabase client instance"""
+# Process-wide clients, created on startup and closed on shutdown
+_client: Optional[Client] = None
+_db: Optional[AsyncPostgrestClient] = None
+_service_db: Optional[AsyncPostgrestClient] = None
+_http: Optional[httpx.AsyncClient] = None
+
+def _check_settings() -> None:
     if not SUPABASE_URL or not SUPABASE_KEY:
         raise ValueError("Supabase URL and key must be set in environment variables")
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+def _pool_limits() -> httpx.Limits:
+    """Connection pool limits shared by the Supabase HTTP sessions"""
+    return httpx.Limits(
+        max_connections=SUPABASE_MAX_CONNECTIONS,
+        max_keepalive_connections=SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY,
+    )
+
+def _api_headers(key: Optional[str] = None) -> dict:
+    key = key or SUPABASE_KEY
+    return {
+        "apiKey": key,
+        "Authorization": f"Bearer {key}",
+    }
+
+class _PooledPostgrestClient(AsyncPostgrestClient):
+    """Async PostgREST client whose HTTP session honours our pool limits"""
+
+    def create_session(self, base_url, headers, timeout) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            limits=_pool_limits(),
+        )
+
+def init_supabase() -> None:
+    """Create the shared async Supabase clients if they do not exist yet"""
+    global _db, _http
+    _check_settings()
+
+    if _db is None:
+        _db = _PooledPostgrestClient(
+            f"{SUPABASE_URL}/rest/v1",
+            headers={**DEFAULT_POSTGREST_CLIENT_HEADERS, **_api_headers()},
+            timeout=SUPABASE_TIMEOUT,
+        )
+
+    if _http is None:
+        _http = httpx.AsyncClient(
+            headers=_api_headers(),
+            timeout=SUPABASE_TIMEOUT,
+            limits=_pool_limits(),
+        )
+
+def create_auth_client() -> AsyncGoTrueClient:
+    """A Supabase Auth client on the shared, pooled HTTP session"""
+    return AsyncGoTrueClient(
+        url=f"{SUPABASE_URL}/auth/v1",
+        headers={**GOTRUE_DEFAULT_HEADERS, **_api_headers()},
+        auto_refresh_token=False,
+        persist_session=False,
+        http_client=get_http(),
+    )
+
+async def close_supabase() -> None:
+    """Close the shared Supabase clients and their pooled connections"""
+    global _client, _db, _service_db, _http
+    if _db is not None:
+        await _db.aclose()
+        _db = None
+    if _service_db is not None:
+        await _service_db.aclose()
+        _service_db = None
+    if _http is not None:
+        await _http.aclose()
+        _http = None
+    if _client is not None:
+        _client.postgrest.session.close()
+        _client.auth.close()
+        _client = None
+
+def get_db() -> AsyncPostgrestClient:
+    """Get the shared async PostgREST client (FastAPI dependency)"""
+    if _db is None:
+        init_supabase()
+    return _db
+
+async def get_auth() -> AsyncIterator[AsyncGoTrueClient]:
+    """
+    Get a Supabase Auth client for one request (FastAPI dependency).
+
+    gotrue keeps the session of the last sign-in or sign-up in memory even
+    with persist_session=False, so a client is never shared between requests
+    and its session is dropped when the request ends.
+    """
+    auth = create_auth_client()
+    try:
+        yield auth
+    finally:
+        await auth._remove_session()
+
+def get_service_db() -> AsyncPostgrestClient:
+    """
+    Get a PostgREST client authenticated with the service role key (FastAPI dependency).
+
+    SUPABASE_KEY is the anon key the frontend also uses, so functions that
+    must not be callable by API clients are granted to service_role only
+    and called through this client.
+    """
+    global _service_db
+    if not SUPABASE_SERVICE_ROLE_KEY:
+        raise HTTPException(status_code=503, detail="SUPABASE_SERVICE_ROLE_KEY is not configured")
+    if _service_db is None:
+        _check_settings()
+        _service_db = _PooledPostgrestClient(
+            f"{SUPABASE_URL}/rest/v1",
+            headers={**DEFAULT_POSTGREST_CLIENT_HEADERS, **_api_headers(SUPABASE_SERVICE_ROLE_KEY)},
+            timeout=SUPABASE_TIMEOUT,
+        )
+    return _service_db
+
+def get_http() -> httpx.AsyncClient:
+    """Get the shared async HTTP client for direct Supabase API calls"""
+    if _http is None:
+        init_supabase()
+    return _http
+
+def get_supabase() -> Client:
+    """Get the shared synchronous Supabase client (scripts and maintenance tasks)"""
+    global _client
+    if _client is not None:
+        return _client
+
+    _check_settings()
+    options = ClientOptions(
+        auto_refresh_token=False,
+        persist_session=False,
+        postgrest_client_timeout=SUPABASE_TIMEOUT,
+    )
+    client = create_client(SUPABASE_URL, SUPABASE_KEY, options)
+
+    session = client.postgrest.session
+    client.postgrest.session = SyncClient(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=session.timeout,
+        limits=_pool_limits(),
+    )
+    session.close()
+
+    _client = client
+    return _client
@@ -0,0 +1,7 @@
+"""
+Provider geocoding and proximity search.
+"""
+
+from .geocoder import check_centroids, geocode, geocode_address, locate_provider
+from .geohash import covering, encode
+from .index import ProviderLocationIndex, haversine_km, provider_locations
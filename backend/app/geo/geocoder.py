@@ -0,0 +1,87 @@
+"""
+Offline geocoding of Canadian postal codes.
+
+Coordinates come from a table of forward sortation area (FSA, the first
+three characters of a postal code) centroids, such as the one derived from
+the Statistics Canada FSA boundary file. The CSV has `fsa,latitude,longitude`
+columns and is read once, at startup, from POSTAL_CENTROIDS_PATH. Without
+it nothing geocodes, and providers are left out of proximity search, so a
+missing table is logged as an error when the application starts.
+"""
+
+import csv
+import json
+import logging
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from postgrest import AsyncPostgrestClient
+from core.config import POSTAL_CENTROIDS_PATH
+from repositories import users as users_repo
+
+logger = logging.getLogger(__name__)
+
+# A full postal code ("M5V 2T6") or just its FSA ("M5V")
+POSTAL_CODE_PATTERN = re.compile(r"\b([A-Z]\d[A-Z])(?:\s?\d[A-Z]\d)?\b", re.IGNORECASE)
+
+_centroids: Optional[Dict[str, Tuple[float, float]]] = None
+
+def load_centroids(path: str = POSTAL_CENTROIDS_PATH) -> Dict[str, Tuple[float, float]]:
+    centroids = {}
+    try:
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                try:
+                    centroids[row["fsa"].strip().upper()] = (float(row["latitude"]), float(row["longitude"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+    except OSError as e:
+        logger.warning(f"Postal code centroids unavailable, geocoding disabled: {str(e)}")
+    return centroids
+
+def _get_centroids() -> Dict[str, Tuple[float, float]]:
+    global _centroids
+    if _centroids is None:
+        _centroids = load_centroids()
+    return _centroids
+
+def check_centroids() -> int:
+    """Load the centroid table, logging an error if it is missing or empty"""
+    count = len(_get_centroids())
+    if not count:
+        logger.error(f"No postal code centroids loaded from {POSTAL_CENTROIDS_PATH}; providers will not be geocoded")
+    return count
+
+def geocode(text: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Latitude and longitude of the first postal code found in free text"""
+    if not text:
+        return None
+    centroids = _get_centroids()
+    for match in POSTAL_CODE_PATTERN.finditer(text):
+        coordinates = centroids.get(match.group(1).upper())
+        if coordinates:
+            return coordinates
+    return None
+
+def geocode_address(address: Any) -> Optional[Tuple[float, float]]:
+    """Geocode a stored user address (a JSON string or dict) by its postal code"""
+    if isinstance(address, str):
+        try:
+            address = json.loads(address)
+        except ValueError:
+            return geocode(address)
+    if not isinstance(address, dict):
+        return None
+    return geocode(address.get("postal_code"))
+
+async def locate_provider(
+    db: AsyncPostgrestClient,
+    user_id: str,
+    location: Optional[str]
+) -> Tuple[Optional[float], Optional[float]]:
+    """Coordinates of a provider from their profile location, else their address"""
+    coordinates = geocode(location)
+    if coordinates is None:
+        user_data = await users_repo.get_by_id(db, user_id, "address")
+        coordinates = geocode_address((user_data or {}).get("address"))
+    return coordinates or (None, None)
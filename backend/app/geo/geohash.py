@@ -0,0 +1,83 @@
+"""
+Geohash encoding and cell covering.
+
+A geohash interleaves longitude and latitude bisection bits into a
+base-32 string; points sharing a prefix lie in the same cell, so a sorted
+list of hashes answers "everything in this cell" with two bisects. A
+circle is covered by the cell containing its centre plus the eight cells
+around it, at the finest precision whose cells are at least as large as
+the radius.
+"""
+
+import math
+from typing import List, Tuple
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Precision of the hashes stored per provider (cells of about 5 x 5 m)
+MAX_PRECISION = 9
+
+KM_PER_DEGREE = 111.32
+
+def encode(latitude: float, longitude: float, precision: int = MAX_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if longitude >= mid:
+                value = value * 2 + 1
+                lng_range[0] = mid
+            else:
+                value = value * 2
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                value = value * 2 + 1
+                lat_range[0] = mid
+            else:
+                value = value * 2
+                lat_range[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """Height and width of a cell in degrees"""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+def precision_for(radius_km: float, latitude: float) -> int:
+    """Finest precision whose cells are at least radius_km tall and wide"""
+    # A degree of longitude is shortest at the circle's poleward edge
+    edge = min(abs(latitude) + radius_km / KM_PER_DEGREE, 89.0)
+    lng_km = KM_PER_DEGREE * math.cos(math.radians(edge))
+    for precision in range(MAX_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        if height * KM_PER_DEGREE >= radius_km and width * lng_km >= radius_km:
+            return precision
+    return 1
+
+def covering(latitude: float, longitude: float, radius_km: float) -> List[str]:
+    """Prefixes of the cells that together contain every point within radius_km"""
+    precision = precision_for(radius_km, latitude)
+    height, width = cell_size(precision)
+    cells = set()
+    for d_lat in (-height, 0.0, height):
+        lat = min(max(latitude + d_lat, -90.0), 90.0)
+        for d_lng in (-width, 0.0, width):
+            # Wrap around the antimeridian
+            lng = (longitude + d_lng + 180.0) % 360.0 - 180.0
+            cells.add(encode(lat, lng, precision))
+    return sorted(cells)
@@ -0,0 +1,127 @@
+"""
+In-process spatial index of provider locations.
+
+Each geocoded provider is kept under the geohash of their coordinates in
+a sorted list, so the providers in a cell are found with two bisects. A
+proximity query gathers the candidates from the cells covering the search
+circle and ranks only those by haversine distance, computed over numpy
+arrays in one pass. The index is a ReloadingSnapshot of the geocoded
+profiles: loaded on first use, reloaded in the background once older than
+CATALOG_TTL seconds, and updated in place by profile writes made through
+this process.
+"""
+
+import bisect
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from postgrest import AsyncPostgrestClient
+from core.config import CATALOG_TTL
+from core.snapshot import ReloadingSnapshot
+from repositories import provider_profiles as profiles_repo
+from .geohash import covering, encode
+
+EARTH_RADIUS_KM = 6371.0088
+
+def haversine_km(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Great-circle distances from one point to arrays of points"""
+    lat1 = np.radians(latitude)
+    lat2 = np.radians(latitudes)
+    d_lat = lat2 - lat1
+    d_lng = np.radians(longitudes - longitude)
+    a = np.sin(d_lat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(d_lng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+class ProviderLocationIndex(ReloadingSnapshot):
+    name = "provider locations"
+
+    def __init__(self, ttl: float):
+        super().__init__(ttl)
+        # provider_id -> (geohash, latitude, longitude)
+        self._entries: Dict[str, Tuple[str, float, float]] = {}
+        # (geohash, provider_id), sorted
+        self._keys: List[Tuple[str, str]] = []
+
+    async def fetch_page(self, db: AsyncPostgrestClient, after, limit: int) -> List[Dict[str, Any]]:
+        return await profiles_repo.list_located(db, after, limit)
+
+    def cursor(self, row: Dict[str, Any]) -> str:
+        return profiles_repo.id_cursor(row)
+
+    def key(self, row: Dict[str, Any]) -> str:
+        return row["user_id"]
+
+    def install(self, rows: Dict[str, Dict[str, Any]]) -> None:
+        self.reset(rows.values())
+
+    def reset(self, profiles: Iterable[Dict[str, Any]]) -> None:
+        entries = {}
+        for profile in profiles:
+            latitude, longitude = profile.get("latitude"), profile.get("longitude")
+            if latitude is None or longitude is None:
+                continue
+            entries[profile["user_id"]] = (encode(latitude, longitude), latitude, longitude)
+        self._entries = entries
+        self._keys = sorted((geohash, provider_id) for provider_id, (geohash, _, _) in entries.items())
+
+    def remove(self, provider_id: str) -> None:
+        self._record(provider_id, None)
+        previous = self._entries.pop(provider_id, None)
+        if previous is None:
+            return
+        key = (previous[0], provider_id)
+        i = bisect.bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            del self._keys[i]
+
+    def upsert(self, provider_id: str, latitude: Optional[float], longitude: Optional[float]) -> None:
+        """Move a provider to new coordinates, or drop them if they have none"""
+        self.remove(provider_id)
+        if latitude is None or longitude is None:
+            return
+        self._record(provider_id, {"user_id": provider_id, "latitude": latitude, "longitude": longitude})
+        geohash = encode(latitude, longitude)
+        self._entries[provider_id] = (geohash, latitude, longitude)
+        bisect.insort(self._keys, (geohash, provider_id))
+
+    def _candidates(self, latitude: float, longitude: float, radius_km: float) -> List[str]:
+        candidates = []
+        for prefix in covering(latitude, longitude, radius_km):
+            # "~" sorts after every geohash character
+            lo = bisect.bisect_left(self._keys, (prefix,))
+            hi = bisect.bisect_left(self._keys, (prefix + "~",))
+            candidates.extend(provider_id for _, provider_id in self._keys[lo:hi])
+        return candidates
+
+    def nearby(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: int,
+        provider_ids: Optional[Set[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """Providers within radius_km of a point, nearest first, with their distance in km"""
+        candidates = self._candidates(latitude, longitude, radius_km)
+        if provider_ids is not None:
+            candidates = [c for c in candidates if c in provider_ids]
+        if not candidates:
+            return []
+
+        coordinates = np.array([self._entries[c][1:] for c in candidates], dtype=float)
+        distances = haversine_km(latitude, longitude, coordinates[:, 0], coordinates[:, 1])
+
+        within = np.flatnonzero(distances <= radius_km)
+        nearest = within[np.argsort(distances[within], kind="stable")[:limit]]
+        return [(candidates[i], float(distances[i])) for i in nearest]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "providers": len(self._entries),
+            **super().stats(),
+        }
+
+provider_locations = ProviderLocationIndex(CATALOG_TTL)
@@ -1,5 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 import os
 import sys
 from dotenv import load_dotenv
@@ -12,7 +14,11 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
 
 # Import directly from relative paths
-from core.config import CORS_ORIGINS, API_TITLE, API_VERSION
+from core.config import CORS_ORIGINS, API_TITLE, API_VERSION, GZIP_MIN_SIZE
+from core.pagination import NEXT_CURSOR_HEADER
+from core.supabase import init_supabase, close_supabase
+from auth.jwks import jwks_cache
+from geo import check_centroids
 from routers.auth import router as auth_router
 from routers.services import router as services_router
 from routers.bookings import router as bookings_router
@@ -23,8 +29,13 @@ from routers.admin import router as admin_router
 app = FastAPI(
     title=API_TITLE,
     version=API_VERSION,
+    # Serialize every JSON response with orjson
+    default_response_class=ORJSONResponse,
 )
 
+# Compress larger responses (service and provider listings)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -32,6 +43,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the frontend read the cursor of the next page of a list
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Load environment variables
@@ -48,8 +61,18 @@ app.include_router(admin_router, prefix="/api/admin", tags=["Admin"])
 # Simple startup event
 @app.on_event("startup")
 async def startup_event():
+    # Open the shared Supabase clients once so requests reuse their connection pools
+    init_supabase()
+    jwks_cache.start()
+    # Geocoding silently finds nothing without the postal code centroids
+    check_centroids()
     print("Application started successfully")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await jwks_cache.stop()
+    await close_supabase()
+
 @app.get("/")
 async def root():
     return {
@@ -0,0 +1,7 @@
+"""
+Async data-access layer for the Supabase tables.
+
+Each module wraps one table and takes the shared AsyncPostgrestClient
+(see core.supabase.get_db) as its first argument, so route handlers
+never block the event loop on an upstream round trip.
+"""
@@ -0,0 +1,18 @@
+from typing import Any, Dict, List, Optional
+
+from postgrest.base_request_builder import APIResponse
+
+def rows(response: APIResponse) -> List[Dict[str, Any]]:
+    """Return the rows of a PostgREST response (empty list if none)"""
+    if hasattr(response, 'data') and response.data:
+        return response.data
+    return []
+
+def first(response: APIResponse) -> Optional[Dict[str, Any]]:
+    """Return the first row of a PostgREST response, or None"""
+    data = rows(response)
+    return data[0] if data else None
+
+def count(response: APIResponse) -> int:
+    """Return the exact row count of a response made with count='exact'"""
+    return response.count or 0
@@ -0,0 +1,195 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+from postgrest import AsyncPostgrestClient
+from core.pagination import Cursor, keyset
+from .base import rows, first, count as row_count
+
+TABLE = "bookings"
+
+# Bookings that hold their time slot; the bookings_no_overlap constraint covers these
+ACTIVE_STATUSES = ("pending", "confirmed")
+# SQLSTATE raised when a write would make two active bookings overlap
+OVERLAP_VIOLATION = "23P01"
+
+async def get_by_id(
+    db: AsyncPostgrestClient,
+    booking_id: str,
+    columns: str = "*"
+) -> Optional[Dict[str, Any]]:
+    """Get a booking by ID"""
+    response = await db.table(TABLE).select(columns).eq("id", booking_id).limit(1).execute()
+    return first(response)
+
+async def get_many(
+    db: AsyncPostgrestClient,
+    booking_ids: List[str],
+    columns: str = "*"
+) -> List[Dict[str, Any]]:
+    """Get a batch of bookings by ID in one query"""
+    if not booking_ids:
+        return []
+    response = await db.table(TABLE).select(columns).in_("id", booking_ids).execute()
+    return rows(response)
+
+async def list_for_user(
+    db: AsyncPostgrestClient,
+    user_id: str,
+    role: Optional[str] = None,
+    status: Optional[str] = None,
+    scheduled_from: Optional[str] = None,
+    scheduled_to: Optional[str] = None,
+    after: Optional[Cursor] = None,
+    limit: Optional[int] = None,
+    columns: str = "*"
+) -> List[Dict[str, Any]]:
+    """List the bookings a user takes part in as client and/or provider"""
+    query = db.table(TABLE).select(columns)
+
+    if role == "client":
+        query = query.eq("client_id", user_id)
+    elif role == "provider":
+        query = query.eq("provider_id", user_id)
+    else:
+        query.params = query.params.add("or", f"(client_id.eq.{user_id},provider_id.eq.{user_id})")
+
+    if status:
+        query = query.eq("status", status)
+    if scheduled_from:
+        query = query.gte("scheduled_at", scheduled_from)
+    if scheduled_to:
+        query = query.lte("scheduled_at", scheduled_to)
+    if limit is not None:
+        query = keyset(query, after, limit)
+
+    response = await query.execute()
+    return rows(response)
+
+async def list_overlapping(
+    db: AsyncPostgrestClient,
+    provider_id: str,
+    starts_at: str,
+    ends_at: str,
+    statuses: Optional[Iterable[str]] = ACTIVE_STATUSES,
+    exclude_id: Optional[str] = None,
+    limit: Optional[int] = None,
+    columns: str = "*"
+) -> List[Dict[str, Any]]:
+    """List a provider's bookings overlapping [starts_at, ends_at), in start order"""
+    query = (
+        db.table(TABLE)
+        .select(columns)
+        .eq("provider_id", provider_id)
+        .lt("scheduled_at", ends_at)
+        .gt("ends_at", starts_at)
+    )
+
+    if statuses:
+        query = query.in_("status", list(statuses))
+    if exclude_id:
+        query = query.neq("id", exclude_id)
+
+    query = query.order("scheduled_at")
+    if limit is not None:
+        query = query.limit(limit)
+
+    response = await query.execute()
+    return rows(response)
+
+async def has_overlap(
+    db: AsyncPostgrestClient,
+    provider_id: str,
+    starts_at: str,
+    ends_at: str,
+    exclude_id: Optional[str] = None
+) -> bool:
+    """Check whether an active booking of the provider overlaps the interval"""
+    overlapping = await list_overlapping(
+        db, provider_id, starts_at, ends_at, exclude_id=exclude_id, limit=1, columns="id"
+    )
+    return bool(overlapping)
+
+async def list_bookings(
+    db: AsyncPostgrestClient,
+    status: Optional[str] = None,
+    payment_status: Optional[str] = None,
+    after: Optional[Cursor] = None,
+    limit: int = 100,
+    columns: str = "*"
+) -> List[Dict[str, Any]]:
+    """List one keyset page of all bookings with optional filtering"""
+    query = db.table(TABLE).select(columns)
+
+    if status:
+        query = query.eq("status", status)
+    if payment_status:
+        query = query.eq("payment_status", payment_status)
+
+    response = await keyset(query, after, limit).execute()
+    return rows(response)
+
+async def list_all(db: AsyncPostgrestClient) -> List[Dict[str, Any]]:
+    """List every booking"""
+    response = await db.table(TABLE).select("*").execute()
+    return rows(response)
+
+async def count(
+    db: AsyncPostgrestClient,
+    status: Optional[str] = None,
+    payment_status: Optional[str] = None
+) -> int:
+    """Count bookings, optionally by status and payment status"""
+    query = db.table(TABLE).select("id", count="exact")
+
+    if status:
+        query = query.eq("status", status)
+    if payment_status:
+        query = query.eq("payment_status", payment_status)
+
+    response = await query.limit(1).execute()
+    return row_count(response)
+
+async def total_revenue(db: AsyncPostgrestClient) -> float:
+    """Sum total_price over paid bookings in the database (needs the service role client)"""
+    request = await db.rpc("sum_paid_revenue", {})
+    result = first(await request.execute())
+    return float(result["total"] or 0) if result else 0.0
+
+async def create(db: AsyncPostgrestClient, booking_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Insert a booking"""
+    response = await db.table(TABLE).insert(booking_data).execute()
+    return first(response)
+
+async def update(
+    db: AsyncPostgrestClient,
+    booking_id: str,
+    update_data: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Update a booking and return the updated row"""
+    response = await db.table(TABLE).update(update_data).eq("id", booking_id).execute()
+    return first(response)
+
+async def update_many(
+    db: AsyncPostgrestClient,
+    booking_ids: List[str],
+    update_data: Dict[str, Any],
+    provider_id: Optional[str] = None,
+    status: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Update a batch of bookings in one statement and return the updated rows.
+
+    provider_id and status restrict the update to bookings that still match
+    them, so ownership and state are checked by the same statement that
+    writes; ids missing from the result did not qualify.
+    """
+    if not booking_ids:
+        return []
+    query = db.table(TABLE).update(update_data).in_("id", booking_ids)
+
+    if provider_id:
+        query = query.eq("provider_id", provider_id)
+    if status:
+        query = query.eq("status", status)
+
+    response = await query.execute()
+    return rows(response)
@@ -0,0 +1,66 @@
+from typing import Any, Dict, List, Optional
+
+from postgrest import AsyncPostgrestClient
+from .base import rows, first
+
+TABLE = "provider_profiles"
+
+async def get_by_user_id(
+    db: AsyncPostgrestClient,
+    user_id: str,
+    columns: str = "*"
+) -> Optional[Dict[str, Any]]:
+    """Get the provider profile belonging to a user"""
+    response = await db.table(TABLE).select(columns).eq("user_id", user_id).limit(1).execute()
+    return first(response)
+
+async def get_many_by_user_id(
+    db: AsyncPostgrestClient,
+    user_ids: List[str],
+    columns: str = "*"
+) -> List[Dict[str, Any]]:
+    """Get the provider profiles belonging to a batch of users in one query"""
+    if not user_ids:
+        return []
+    response = await db.table(TABLE).select(columns).in_("user_id", user_ids).execute()
+    return rows(response)
+
+def _after_id(query, after: Optional[str], limit: int):
+    """Order a query by id and start it after an id, with one look-ahead row"""
+    if after:
+        query = query.gt("id", after)
+    return query.order("id").limit(limit + 1)
+
+def id_cursor(row: Dict[str, Any]) -> str:
+    return str(row["id"])
+
+async def list_located(db: AsyncPostgrestClient, after: Optional[str], limit: int) -> List[Dict[str, Any]]:
+    """List one page of the coordinates of geocoded providers, in id order"""
+    query = (
+        db.table(TABLE)
+        .select("id,user_id,latitude,longitude")
+        .not_.is_("latitude", "null")
+        .not_.is_("longitude", "null")
+    )
+    response = await _after_id(query, after, limit).execute()
+    return rows(response)
+
+async def list_unlocated(db: AsyncPostgrestClient, after: Optional[str], limit: int) -> List[Dict[str, Any]]:
+    """List one page of the providers that have no coordinates yet, in id order"""
+    query = db.table(TABLE).select("id,user_id,location").is_("latitude", "null")
+    response = await _after_id(query, after, limit).execute()
+    return rows(response)
+
+async def create(db: AsyncPostgrestClient, profile_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Insert a provider profile"""
+    response = await db.table(TABLE).insert(profile_data).execute()
+    return first(response)
+
+async def update_by_user_id(
+    db: AsyncPostgrestClient,
+    user_id: str,
+    update_data: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Update the provider profile belonging to a user"""
+    response = await db.table(TABLE).update(update_data).eq("user_id", user_id).execute()
+    return first(response)
@@ -0,0 +1,55 @@
+from typing import Any, Dict, List, Optional
+
+from postgrest import AsyncPostgrestClient
+from core.pagination import Cursor, keyset
+from .base import rows, first
+
+TABLE = "reviews"
+
+async def get_by_booking_id(db: AsyncPostgrestClient, booking_id: str) -> Optional[Dict[str, Any]]:
+    """Get the review left for a booking"""
+    response = await db.table(TABLE).select("*").eq("booking_id", booking_id).limit(1).execute()
+    return first(response)
+
+async def list_for_provider(
+    db: AsyncPostgrestClient,
+    provider_id: str,
+    after: Optional[Cursor] = None,
+    limit: Optional[int] = None,
+    columns: str = "*"
+) -> List[Dict[str, Any]]:
+    """List the reviews of a provider"""
+    query = db.table(TABLE).select(columns).eq("provider_id", provider_id)
+
+    if limit is not None:
+        query = keyset(query, after, limit)
+
+    response = await query.execute()
+    return rows(response)
+
+async def list_for_service(
+    db: AsyncPostgrestClient,
+    service_id: str,
+    after: Optional[Cursor] = None,
+    limit: Optional[int] = None,
+    columns: str = "*"
+) -> List[Dict[str, Any]]:
+    """List the reviews of a service"""
+    query = db.table(TABLE).select(columns).eq("service_id", service_id)
+
+    if limit is not None:
+        query = keyset(query, after, limit)
+
+    response = await query.execute()
+    return rows(response)
+
+async def create(db: AsyncPostgrestClient, review_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Insert a review"""
+    response = await db.table(TABLE).insert(review_data).execute()
+    return first(response)
+
+async def reconcile_provider_ratings(db: AsyncPostgrestClient) -> int:
+    """Recompute provider rating aggregates from reviews, returning how many were repaired"""
+    request = await db.rpc("reconcile_provider_ratings", {})
+    result = first(await request.execute())
+    return result["repaired"] if result else 0
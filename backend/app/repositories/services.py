@@ -0,0 +1,92 @@
+from typing import Any, Dict, List, Optional
+
+from postgrest import AsyncPostgrestClient
+from core.pagination import Cursor, keyset
+from .base import rows, first, count as row_count
+
+TABLE = "services"
+
+async def get_by_id(
+    db: AsyncPostgrestClient,
+    service_id: str,
+    columns: str = "*"
+) -> Optional[Dict[str, Any]]:
+    """Get a service by ID"""
+    response = await db.table(TABLE).select(columns).eq("id", service_id).limit(1).execute()
+    return first(response)
+
+async def get_many(
+    db: AsyncPostgrestClient,
+    service_ids: List[str],
+    columns: str = "*"
+) -> List[Dict[str, Any]]:
+    """Get a batch of services by ID in one query"""
+    if not service_ids:
+        return []
+    response = await db.table(TABLE).select(columns).in_("id", service_ids).execute()
+    return rows(response)
+
+async def list_services(
+    db: AsyncPostgrestClient,
+    is_active: Optional[bool] = None,
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    provider_id: Optional[str] = None,
+    after: Optional[Cursor] = None,
+    limit: Optional[int] = None,
+    columns: str = "*"
+) -> List[Dict[str, Any]]:
+    """List services with optional filtering, one keyset page at a time if limit is given"""
+    query = db.table(TABLE).select(columns)
+
+    if is_active is not None:
+        query = query.eq("is_active", is_active)
+    if provider_id:
+        query = query.eq("provider_id", provider_id)
+    if category:
+        query = query.eq("category", category)
+    if min_price is not None:
+        query = query.gte("price", min_price)
+    if max_price is not None:
+        query = query.lte("price", max_price)
+    if limit is not None:
+        query = keyset(query, after, limit)
+
+    response = await query.execute()
+    return rows(response)
+
+async def count(db: AsyncPostgrestClient, is_active: Optional[bool] = None) -> int:
+    """Count services, optionally by active state"""
+    query = db.table(TABLE).select("id", count="exact")
+
+    if is_active is not None:
+        query = query.eq("is_active", is_active)
+
+    response = await query.limit(1).execute()
+    return row_count(response)
+
+async def create(db: AsyncPostgrestClient, service_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Insert a service"""
+    response = await db.table(TABLE).insert(service_data).execute()
+    return first(response)
+
+async def create_many(db: AsyncPostgrestClient, services_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Insert a batch of services in one statement and return them in input order"""
+    if not services_data:
+        return []
+    response = await db.table(TABLE).insert(services_data).execute()
+    return rows(response)
+
+async def update(
+    db: AsyncPostgrestClient,
+    service_id: str,
+    update_data: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Update a service and return the updated row"""
+    response = await db.table(TABLE).update(update_data).eq("id", service_id).execute()
+    return first(response)
+
+async def delete(db: AsyncPostgrestClient, service_id: str) -> None:
+    """Delete a service"""
+    await db.table(TABLE).delete().eq("id", service_id).execute()
@@ -0,0 +1,111 @@
+from typing import Any, Dict, List, Optional
+
+from postgrest import AsyncPostgrestClient
+from core.pagination import Cursor, keyset
+from core.cache import TTLCache
+from core.config import USER_CACHE_TTL, USER_CACHE_SIZE
+from .base import rows, first, count as row_count
+
+TABLE = "users"
+
+# Profiles read by authorization checks; writes through update() refresh them
+_profile_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+# The columns authorization checks need, all that is fetched and cached for them
+AUTH_COLUMNS = ("id", "email", "role")
+
+async def get_by_id(
+    db: AsyncPostgrestClient,
+    user_id: str,
+    columns: str = "*"
+) -> Optional[Dict[str, Any]]:
+    """Get a user profile by ID"""
+    response = await db.table(TABLE).select(columns).eq("id", user_id).limit(1).execute()
+    return first(response)
+
+async def get_many(
+    db: AsyncPostgrestClient,
+    user_ids: List[str],
+    columns: str = "*"
+) -> List[Dict[str, Any]]:
+    """Get the user profiles for a batch of IDs in one query"""
+    if not user_ids:
+        return []
+    response = await db.table(TABLE).select(columns).in_("id", user_ids).execute()
+    return rows(response)
+
+async def get_cached(db: AsyncPostgrestClient, user_id: str) -> Optional[Dict[str, Any]]:
+    """Get the AUTH_COLUMNS of a user profile, served from memory for up to USER_CACHE_TTL seconds"""
+    profile = _profile_cache.get(user_id)
+    if profile is None:
+        profile = await get_by_id(db, user_id, ",".join(AUTH_COLUMNS))
+        if not profile:
+            return None
+        _profile_cache.set(user_id, profile)
+    # Hand out copies so callers can't mutate the cached row
+    return dict(profile)
+
+def invalidate(user_id: str) -> None:
+    """Drop a cached user profile"""
+    _profile_cache.pop(user_id)
+
+def cache_stats() -> Dict[str, Any]:
+    return _profile_cache.stats()
+
+async def get_by_email(db: AsyncPostgrestClient, email: str) -> Optional[Dict[str, Any]]:
+    """Get a user profile by email"""
+    response = await db.table(TABLE).select("*").eq("email", email).limit(1).execute()
+    return first(response)
+
+async def list_users(
+    db: AsyncPostgrestClient,
+    role: Optional[str] = None,
+    is_verified: Optional[bool] = None,
+    after: Optional[Cursor] = None,
+    limit: int = 100,
+    columns: str = "*"
+) -> List[Dict[str, Any]]:
+    """List one keyset page of user profiles with optional filtering"""
+    query = db.table(TABLE).select(columns)
+
+    if role:
+        query = query.eq("role", role)
+    if is_verified is not None:
+        query = query.eq("is_verified", is_verified)
+
+    response = await keyset(query, after, limit).execute()
+    return rows(response)
+
+async def count(db: AsyncPostgrestClient, role: Optional[str] = None) -> int:
+    """Count user profiles, optionally by role"""
+    query = db.table(TABLE).select("id", count="exact")
+
+    if role:
+        query = query.eq("role", role)
+
+    response = await query.limit(1).execute()
+    return row_count(response)
+
+async def list_all(db: AsyncPostgrestClient) -> List[Dict[str, Any]]:
+    """List every user profile"""
+    response = await db.table(TABLE).select("*").execute()
+    return rows(response)
+
+async def create(db: AsyncPostgrestClient, user_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Insert a user profile"""
+    response = await db.table(TABLE).insert(user_data).execute()
+    return first(response)
+
+async def update(
+    db: AsyncPostgrestClient,
+    user_id: str,
+    update_data: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Update a user profile and return the updated row"""
+    response = await db.table(TABLE).update(update_data).eq("id", user_id).execute()
+    updated = first(response)
+
+    if updated:
+        _profile_cache.set(user_id, {k: updated.get(k) for k in AUTH_COLUMNS})
+    else:
+        invalidate(user_id)
+    return updated
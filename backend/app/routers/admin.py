@@ -1,43 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from typing import List, Optional
-import os
+import asyncio
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from postgrest import AsyncPostgrestClient
+from postgrest.exceptions import APIError
+from core.config import EXPORT_PAGE_SIZE, PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from core.pagination import decode_cursor, paginate
+from core.streaming import export_response, iter_pages
+from core.supabase import get_db, get_service_db
+from auth.verify_supabase_token import get_current_user, token_cache_stats
+from auth.jwks import jwks_cache
+from catalog import catalog, search_index
+from geo import geocode, geocode_address, provider_locations
+from scheduling import availability
+from repositories import users as users_repo
+from repositories import services as services_repo
+from repositories import bookings as bookings_repo
+from repositories import reviews as reviews_repo
+from repositories import provider_profiles as profiles_repo
 
 # Load environment variables
 load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
 # Router
 router = APIRouter()
-security = HTTPBearer()
 
-def get_supabase() -> Client:
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+# Providers whose addresses are fetched per query when geocoding
+GEOCODE_BATCH_SIZE = 200
+
+# Columns written by the reconciliation exports, in order
+USER_EXPORT_FIELDS = (
+    "id", "email", "full_name", "phone_number", "address", "role", "is_verified", "created_at"
+)
+BOOKING_EXPORT_FIELDS = (
+    "id", "service_id", "client_id", "provider_id", "status", "scheduled_at", "ends_at",
+    "total_price", "payment_status", "notes", "created_at", "updated_at"
+)
 
-def admin_required(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def admin_required(
+    user = Depends(get_current_user),
+    db: AsyncPostgrestClient = Depends(get_db)
+):
     """Check if user is admin"""
-    supabase = get_supabase()
+    # Get user profile
+    user_data = await users_repo.get_cached(db, user["id"])
     
-    try:
-        # Verify token
-        user = supabase.auth.get_user(credentials.credentials)
-        
-        # Get user profile
-        response = supabase.table("users").select("*").eq("id", user.user.id).single().execute()
-        
-        if not hasattr(response, 'data') or not response.data:
-            raise HTTPException(status_code=404, detail="User profile not found")
-        
-        if response.data.get("role") != "admin":
-            raise HTTPException(status_code=403, detail="Admin access required")
-        
-        return response.data
-    except Exception as e:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    if not user_data:
+        raise HTTPException(status_code=404, detail="User profile not found")
+    
+    if user_data.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return user_data
 
 @router.get("/")
 async def admin_root(admin = Depends(admin_required)):
@@ -45,128 +59,165 @@ async def admin_root(admin = Depends(admin_required)):
 
 @router.get("/users")
 async def get_all_users(
+    response: Response,
     role: Optional[str] = None,
     is_verified: Optional[bool] = None,
-    skip: int = 0,
-    limit: int = 100,
-    admin = Depends(admin_required)
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    admin = Depends(admin_required),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
-    """Get all users with optional filtering"""
-    supabase = get_supabase()
-    
-    query = supabase.table("users").select("*")
-    
-    if role:
-        query = query.eq("role", role)
-    if is_verified is not None:
-        query = query.eq("is_verified", is_verified)
-    
-    query = query.range(skip, skip + limit - 1)
-    response = query.execute()
-    
-    if not hasattr(response, 'data'):
-        return []
+    """Get all users with optional filtering, newest first, one page at a time"""
+    users = await users_repo.list_users(
+        db,
+        role=role,
+        is_verified=is_verified,
+        after=decode_cursor(cursor),
+        limit=limit
+    )
+    return paginate(users, limit, response)
+
+@router.get("/users/export")
+async def export_users(
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    role: Optional[str] = None,
+    is_verified: Optional[bool] = None,
+    admin = Depends(admin_required),
+    db: AsyncPostgrestClient = Depends(get_db)
+):
+    """Stream all users as NDJSON or CSV, newest first"""
+    async def fetch_page(after, limit):
+        return await users_repo.list_users(
+            db,
+            role=role,
+            is_verified=is_verified,
+            after=after,
+            limit=limit,
+            columns=",".join(USER_EXPORT_FIELDS)
+        )
     
-    return response.data
+    # Each page is sent before the next one is read
+    return export_response(iter_pages(fetch_page, EXPORT_PAGE_SIZE), format, USER_EXPORT_FIELDS, "users")
 
 @router.get("/users/{user_id}")
 async def get_user(
     user_id: str,
-    admin = Depends(admin_required)
+    admin = Depends(admin_required),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
     """Get a specific user by ID"""
-    supabase = get_supabase()
-    
-    response = supabase.table("users").select("*").eq("id", user_id).single().execute()
+    user = await users_repo.get_by_id(db, user_id)
     
-    if not hasattr(response, 'data') or not response.data:
+    if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    return response.data
+    return user
 
 @router.put("/users/{user_id}")
 async def update_user(
     user_id: str,
     user_data: dict,
-    admin = Depends(admin_required)
+    admin = Depends(admin_required),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
     """Update a user (Admin only)"""
-    supabase = get_supabase()
-    
     # Check if user exists
-    user_check = supabase.table("users").select("*").eq("id", user_id).single().execute()
+    user_check = await users_repo.get_by_id(db, user_id, "id")
     
-    if not hasattr(user_check, 'data') or not user_check.data:
+    if not user_check:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Update user
-    response = supabase.table("users").update(user_data).eq("id", user_id).execute()
+    updated_user = await users_repo.update(db, user_id, user_data)
     
-    if not hasattr(response, 'data') or not response.data:
+    if not updated_user:
         raise HTTPException(status_code=500, detail="Failed to update user")
     
-    return response.data[0]
+    return updated_user
 
 @router.put("/users/{user_id}/role")
 async def update_user_role(
     user_id: str,
     role: str,
-    admin = Depends(admin_required)
+    admin = Depends(admin_required),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
     """Update a user's role (Admin only)"""
-    supabase = get_supabase()
-    
     # Check if user exists
-    user_check = supabase.table("users").select("*").eq("id", user_id).single().execute()
+    user_check = await users_repo.get_by_id(db, user_id, "id")
     
-    if not hasattr(user_check, 'data') or not user_check.data:
+    if not user_check:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Update role
-    response = supabase.table("users").update({"role": role}).eq("id", user_id).execute()
+    updated_user = await users_repo.update(db, user_id, {"role": role})
     
-    if not hasattr(response, 'data') or not response.data:
+    if not updated_user:
         raise HTTPException(status_code=500, detail="Failed to update user role")
     
-    return response.data[0]
+    # Role checks read the users cache, which update() has already refreshed in
+    # this process; other workers pick the new role up within USER_CACHE_TTL
+    return updated_user
+
+@router.get("/bookings/export")
+async def export_bookings(
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    payment_status: Optional[str] = None,
+    admin = Depends(admin_required),
+    db: AsyncPostgrestClient = Depends(get_db)
+):
+    """Stream all bookings as NDJSON or CSV, newest first"""
+    async def fetch_page(after, limit):
+        return await bookings_repo.list_bookings(
+            db,
+            status=status_filter,
+            payment_status=payment_status,
+            after=after,
+            limit=limit,
+            columns=",".join(BOOKING_EXPORT_FIELDS)
+        )
+    
+    return export_response(iter_pages(fetch_page, EXPORT_PAGE_SIZE), format, BOOKING_EXPORT_FIELDS, "bookings")
 
 @router.get("/dashboard/stats")
 async def get_dashboard_stats(
-    admin = Depends(admin_required)
+    admin = Depends(admin_required),
+    db: AsyncPostgrestClient = Depends(get_db),
+    service_db: AsyncPostgrestClient = Depends(get_service_db)
 ):
     """Get admin dashboard statistics"""
-    supabase = get_supabase()
-    
-    # Count users by role
-    all_users = supabase.table("users").select("*").execute()
-    users_data = all_users.data if hasattr(all_users, 'data') else []
-    
-    # Process users data
-    total_users = len(users_data)
-    clients = sum(1 for u in users_data if u.get("role") == "client")
-    providers = sum(1 for u in users_data if u.get("role") == "provider")
-    admins = sum(1 for u in users_data if u.get("role") == "admin")
-    
-    # Count services
-    all_services = supabase.table("services").select("*").execute()
-    services_data = all_services.data if hasattr(all_services, 'data') else []
-    
-    total_services = len(services_data)
-    active_services = sum(1 for s in services_data if s.get("is_active") == True)
-    
-    # Count bookings
-    all_bookings = supabase.table("bookings").select("*").execute()
-    bookings_data = all_bookings.data if hasattr(all_bookings, 'data') else []
-    
-    total_bookings = len(bookings_data)
-    pending_bookings = sum(1 for b in bookings_data if b.get("status") == "pending")
-    confirmed_bookings = sum(1 for b in bookings_data if b.get("status") == "confirmed")
-    completed_bookings = sum(1 for b in bookings_data if b.get("status") == "completed")
-    cancelled_bookings = sum(1 for b in bookings_data if b.get("status") == "cancelled")
-    
-    # Payment statistics
-    paid_bookings = sum(1 for b in bookings_data if b.get("payment_status") == "paid")
-    total_revenue = sum(b.get("total_price", 0) for b in bookings_data if b.get("payment_status") == "paid")
+    # Count everything in parallel with server-side counts and aggregates
+    (
+        total_users,
+        clients,
+        providers,
+        admins,
+        total_services,
+        active_services,
+        total_bookings,
+        pending_bookings,
+        confirmed_bookings,
+        completed_bookings,
+        cancelled_bookings,
+        paid_bookings,
+        total_revenue
+    ) = await asyncio.gather(
+        users_repo.count(db),
+        users_repo.count(db, role="client"),
+        users_repo.count(db, role="provider"),
+        users_repo.count(db, role="admin"),
+        services_repo.count(db),
+        services_repo.count(db, is_active=True),
+        bookings_repo.count(db),
+        bookings_repo.count(db, status="pending"),
+        bookings_repo.count(db, status="confirmed"),
+        bookings_repo.count(db, status="completed"),
+        bookings_repo.count(db, status="cancelled"),
+        bookings_repo.count(db, payment_status="paid"),
+        # Only service_role may execute the revenue function
+        bookings_repo.total_revenue(service_db)
+    )
     
     return {
         "users": {
@@ -190,4 +241,66 @@ async def get_dashboard_stats(
             "paid_bookings": paid_bookings,
             "total_revenue": total_revenue
         }
-    } 
\ No newline at end of file
+    } 
+
+@router.post("/ratings/reconcile")
+async def reconcile_ratings(
+    admin = Depends(admin_required),
+    service_db: AsyncPostgrestClient = Depends(get_service_db)
+):
+    """Recompute provider rating aggregates from all reviews to repair drift"""
+    # Only service_role may execute the reconcile function
+    try:
+        repaired = await reviews_repo.reconcile_provider_ratings(service_db)
+    except APIError as e:
+        if e.code == "42501":
+            raise HTTPException(status_code=403, detail="The API key may not reconcile ratings")
+        raise HTTPException(status_code=503, detail=f"Failed to reconcile ratings: {e.message}")
+    
+    return {"repaired": repaired}
+
+@router.post("/providers/geocode")
+async def geocode_providers(
+    admin = Depends(admin_required),
+    db: AsyncPostgrestClient = Depends(get_db)
+):
+    """Fill in coordinates for providers that have none, from their location or address"""
+    located = 0
+    remaining = 0
+    
+    # Providers that do not geocode keep null coordinates, so pages advance by id past them
+    async def fetch_page(after, limit):
+        return await profiles_repo.list_unlocated(db, after, limit)
+    
+    async for batch in iter_pages(fetch_page, GEOCODE_BATCH_SIZE, profiles_repo.id_cursor):
+        users_data = await users_repo.get_many(db, [p["user_id"] for p in batch], "id,address")
+        addresses = {u["id"]: u.get("address") for u in users_data}
+        
+        for profile in batch:
+            coordinates = geocode(profile.get("location")) or geocode_address(addresses.get(profile["user_id"]))
+            if not coordinates:
+                remaining += 1
+                continue
+            latitude, longitude = coordinates
+            await profiles_repo.update_by_user_id(
+                db, profile["user_id"], {"latitude": latitude, "longitude": longitude}
+            )
+            provider_locations.upsert(profile["user_id"], latitude, longitude)
+            located += 1
+    
+    return {"located": located, "remaining": remaining}
+
+@router.get("/cache/stats")
+async def get_cache_stats(
+    admin = Depends(admin_required)
+):
+    """Get hit/miss statistics for the in-process caches"""
+    return {
+        "jwks": jwks_cache.stats(),
+        "tokens": token_cache_stats(),
+        "user_profiles": users_repo.cache_stats(),
+        "catalog": catalog.stats(),
+        "search": search_index.stats(),
+        "slots": availability.cache_stats(),
+        "provider_locations": provider_locations.stats()
+    }
@@ -1,17 +1,27 @@
 # backend/app/routers/auth.py
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.security import HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
 from typing import Optional, Dict, Any, Union
 import os
-import requests
+import logging
+import httpx
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from gotrue import AsyncGoTrueClient
+from postgrest import AsyncPostgrestClient
+from core.projection import columns
+from core.supabase import get_db, get_auth, get_http
+from auth.verify_supabase_token import get_current_user as verify_user, invalidate_token, security
+from repositories import users as users_repo
+from repositories import provider_profiles as profiles_repo
+from geo import geocode, geocode_address, provider_locations
 import json
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
@@ -62,25 +72,26 @@ class PasswordUpdateRequest(BaseModel):
     access_token: str
     password: str
 
+# Columns a profile read selects
+USER_COLUMNS = columns(UserResponse)
+
 # Router
 router = APIRouter()
-security = HTTPBearer()
-
-def get_supabase() -> Client:
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
 
 @router.post("/signup", status_code=status.HTTP_201_CREATED)
-async def signup(user: UserSignUp):
+async def signup(
+    user: UserSignUp,
+    auth: AsyncGoTrueClient = Depends(get_auth),
+    db: AsyncPostgrestClient = Depends(get_db)
+):
     """Register a new user"""
-    supabase = get_supabase()
-    
     # Validate role
     if user.role not in ["client", "provider"]:
         raise HTTPException(status_code=400, detail="Role must be either 'client' or 'provider'")
     
     try:
         # Create auth user
-        auth_response = supabase.auth.sign_up({
+        auth_response = await auth.sign_up({
             "email": user.email,
             "password": user.password
         })
@@ -112,7 +123,7 @@ async def signup(user: UserSignUp):
             "role": role
         }
         
-        profile_response = supabase.table("users").insert(user_data).execute()
+        await users_repo.create(db, user_data)
         
         return {"message": "User created successfully", "user_id": auth_response.user.id}
     except Exception as e:
@@ -120,12 +131,13 @@ async def signup(user: UserSignUp):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/login")
-async def login(user: UserLogin):
+async def login(
+    user: UserLogin,
+    auth: AsyncGoTrueClient = Depends(get_auth)
+):
     """Log in a user"""
-    supabase = get_supabase()
-    
     try:
-        response = supabase.auth.sign_in_with_password({
+        response = await auth.sign_in_with_password({
             "email": user.email,
             "password": user.password
         })
@@ -141,21 +153,40 @@ async def login(user: UserLogin):
     except Exception as e:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+@router.post("/logout")
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    user = Depends(verify_user),
+    auth: AsyncGoTrueClient = Depends(get_auth)
+):
+    """Log out the current user and revoke their session"""
+    # Stop accepting this token locally, then revoke the session upstream
+    invalidate_token(credentials.credentials)
+    
+    try:
+        await auth.admin.sign_out(credentials.credentials)
+    except Exception as e:
+        logger.warning(f"Sign out error: {e}")
+    
+    return {"message": "Logged out successfully"}
+
 @router.post("/reset-password")
-async def reset_password(reset_request: PasswordResetRequest):
+async def reset_password(
+    reset_request: PasswordResetRequest,
+    auth: AsyncGoTrueClient = Depends(get_auth),
+    db: AsyncPostgrestClient = Depends(get_db)
+):
     """Send password reset email"""
-    supabase = get_supabase()
-    
     try:
         # Check if user exists
-        user_response = supabase.table("users").select("*").eq("email", reset_request.email).execute()
+        existing_user = await users_repo.get_by_email(db, reset_request.email)
         
-        if not user_response.data:
+        if not existing_user:
             # Don't reveal if email exists or not for security
             return {"message": "If the email exists in our system, a password reset link has been sent."}
         
         # Send password reset email with redirect URL
-        response = supabase.auth.reset_password_email(
+        await auth.reset_password_email(
             reset_request.email,
             {
                 "redirect_to": f"{FRONTEND_URL}/reset-password"
@@ -168,14 +199,17 @@ async def reset_password(reset_request: PasswordResetRequest):
         return {"message": "If the email exists in our system, a password reset link has been sent."}
 
 @router.post("/update-password")
-async def update_password(update_request: PasswordUpdateRequest):
+async def update_password(
+    update_request: PasswordUpdateRequest,
+    auth: AsyncGoTrueClient = Depends(get_auth),
+    http: httpx.AsyncClient = Depends(get_http)
+):
     """Update password using reset token"""
     
     try:
-        # Verify the token first using our main client
-        supabase = get_supabase()
+        # Verify the token first using our shared auth client
         try:
-            user_response = supabase.auth.get_user(update_request.access_token)
+            user_response = await auth.get_user(update_request.access_token)
             if not user_response.user:
                 raise HTTPException(status_code=400, detail="Invalid or expired reset token")
         except Exception as e:
@@ -194,7 +228,7 @@ async def update_password(update_request: PasswordUpdateRequest):
             "password": update_request.password
         }
         
-        response = requests.put(url, json=data, headers=headers)
+        response = await http.put(url, json=data, headers=headers)
         
         if response.status_code == 200:
             return {"message": "Password updated successfully"}
@@ -209,22 +243,18 @@ async def update_password(update_request: PasswordUpdateRequest):
         raise HTTPException(status_code=400, detail="Failed to update password. The reset link may have expired.")
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_current_user(
+    user = Depends(verify_user),
+    db: AsyncPostgrestClient = Depends(get_db)
+):
     """Get the current user's profile"""
-    supabase = get_supabase()
-    
     try:
-        # Verify token
-        user = supabase.auth.get_user(credentials.credentials)
-        
         # Get user profile
-        response = supabase.table("users").select("*").eq("id", user.user.id).single().execute()
+        user_data = await users_repo.get_by_id(db, user["id"], USER_COLUMNS)
         
-        if not hasattr(response, 'data') or not response.data:
+        if not user_data:
             raise HTTPException(status_code=404, detail="User profile not found")
         
-        user_data = response.data
-        
         # Parse address JSON if it exists and convert to dict for frontend
         if user_data.get('address'):
             try:
@@ -239,18 +269,25 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except Exception as e:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
 
+async def relocate_provider(db: AsyncPostgrestClient, user_id: str, address: Any) -> None:
+    """Geocode a provider again after their address changed"""
+    profile = await profiles_repo.get_by_user_id(db, user_id, "location")
+    if not profile:
+        return
+    
+    # The profile location still takes precedence over the address
+    latitude, longitude = geocode(profile.get("location")) or geocode_address(address) or (None, None)
+    await profiles_repo.update_by_user_id(db, user_id, {"latitude": latitude, "longitude": longitude})
+    provider_locations.upsert(user_id, latitude, longitude)
+
 @router.put("/me", response_model=UserResponse)
 async def update_user(
     user_update: UserBase,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user = Depends(verify_user),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
     """Update the current user's profile"""
-    supabase = get_supabase()
-    
     try:
-        # Verify token
-        user = supabase.auth.get_user(credentials.credentials)
-        
         # Update user profile
         update_data = user_update.dict(exclude_unset=True)
         
@@ -262,12 +299,14 @@ async def update_user(
             elif isinstance(update_data['address'], dict):
                 update_data['address'] = json.dumps(update_data['address'])
         
-        response = supabase.table("users").update(update_data).eq("id", user.user.id).execute()
+        user_data = await users_repo.update(db, user["id"], update_data)
         
-        if not hasattr(response, 'data') or not response.data:
+        if not user_data:
             raise HTTPException(status_code=404, detail="User profile not found")
         
-        user_data = response.data[0]
+        # Proximity search uses coordinates derived from the address
+        if 'address' in update_data:
+            await relocate_provider(db, user["id"], user_data.get('address'))
         
         # Parse address JSON if it exists and convert to dict for frontend
         if user_data.get('address'):
@@ -284,19 +323,15 @@ async def update_user(
 
 @router.post("/provider-application")
 async def apply_to_be_provider(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user = Depends(verify_user),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
     """Apply to become a service provider"""
-    supabase = get_supabase()
-    
     try:
-        # Verify token
-        user = supabase.auth.get_user(credentials.credentials)
-        
         # Update user role to pending_provider
-        response = supabase.table("users").update({"role": "pending_provider"}).eq("id", user.user.id).execute()
+        updated_user = await users_repo.update(db, user["id"], {"role": "pending_provider"})
         
-        if not hasattr(response, 'data') or not response.data:
+        if not updated_user:
             raise HTTPException(status_code=404, detail="User profile not found")
         
         return {"message": "Application submitted successfully"}
@@ -306,23 +341,17 @@ async def apply_to_be_provider(
 @router.get("/user/{user_id}", response_model=UserResponse)
 async def get_user_by_id(
     user_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user = Depends(verify_user),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
     """Get user details by ID (for enriching booking data)"""
-    supabase = get_supabase()
-    
     try:
-        # Verify token (ensure user is authenticated)
-        supabase.auth.get_user(credentials.credentials)
-        
         # Get user profile by ID
-        response = supabase.table("users").select("*").eq("id", user_id).single().execute()
+        user_data = await users_repo.get_by_id(db, user_id, USER_COLUMNS)
         
-        if not hasattr(response, 'data') or not response.data:
+        if not user_data:
             raise HTTPException(status_code=404, detail="User not found")
         
-        user_data = response.data
-        
         # Parse address JSON if it exists and convert to dict for frontend
         if user_data.get('address'):
             try:
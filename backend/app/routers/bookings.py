@@ -1,17 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel
-from typing import List, Optional
-from datetime import datetime
-import os
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pydantic import BaseModel, conlist
+from typing import List, Optional, Union
+from datetime import date, datetime, time, timedelta
+import asyncio
+import logging
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from postgrest import AsyncPostgrestClient
+from postgrest.exceptions import APIError
+from core.config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from core.pagination import decode_cursor, paginate
+from core.projection import columns
+from core.supabase import get_db
+from auth.verify_supabase_token import get_current_user
+from repositories import bookings as bookings_repo
+from repositories import services as services_repo
+from scheduling import availability
 
 # Load environment variables
 load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+logger = logging.getLogger(__name__)
 
 # Models
 class BookingBase(BaseModel):
@@ -34,6 +42,7 @@ class BookingResponse(BookingBase):
     status: str
     total_price: float
     created_at: datetime
+    ends_at: Optional[datetime] = None
     
     class Config:
         orm_mode = True
@@ -42,43 +51,76 @@ class BookingStatusUpdate(BaseModel):
     status: str  # "confirmed" or "rejected"
     notes: Optional[str] = None
 
+class BookingStatusBatchItem(BaseModel):
+    booking_id: str
+    status: str  # "confirmed" or "rejected"
+
+class BookingStatusBatch(BaseModel):
+    updates: conlist(BookingStatusBatchItem, min_items=1, max_items=100)
+    # Applied to every updated booking, so each status stays a single update
+    notes: Optional[str] = None
+
+class BookingStatusResult(BaseModel):
+    booking_id: str
+    ok: bool
+    status: Optional[str] = None
+    error: Optional[str] = None
+
+# Columns the read endpoints and permission checks select
+BOOKING_COLUMNS = columns(BookingResponse)
+
 # Router
 router = APIRouter()
-security = HTTPBearer()
 
-def get_supabase() -> Client:
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+# Statuses a provider may move a pending booking to
+PROVIDER_STATUSES = ("confirmed", "rejected")
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    supabase = get_supabase()
-    try:
-        user = supabase.auth.get_user(credentials.credentials)
-        return user.user
-    except Exception as e:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+# Length assumed for a service without duration_minutes, as set_booking_ends_at does
+DEFAULT_DURATION_MINUTES = 60
+
+def overlap_conflict() -> HTTPException:
+    return HTTPException(status_code=409, detail="The provider already has a booking at this time")
+
+def booking_end(service: Optional[dict], scheduled_at: datetime) -> datetime:
+    """
+    When a booking of the service starts at scheduled_at ends.
+
+    The set_booking_ends_at trigger stores ends_at on every write, so this
+    only mirrors it for the overlap pre-check.
+    """
+    minutes = (service or {}).get("duration_minutes") or DEFAULT_DURATION_MINUTES
+    return scheduled_at + timedelta(minutes=minutes)
 
 @router.post("/", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
 async def create_booking(
     booking: BookingCreate,
-    user = Depends(get_current_user)
+    user = Depends(get_current_user),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
     """Create a new booking with pending status"""
-    supabase = get_supabase()
-    
     # Get the service
-    service_response = supabase.table("services").select("*").eq("id", booking.service_id).single().execute()
+    service = await services_repo.get_by_id(db, booking.service_id, "id,provider_id,price,duration_minutes")
     
-    if not hasattr(service_response, 'data') or not service_response.data:
+    if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     
-    service = service_response.data
+    ends_at = booking_end(service, booking.scheduled_at)
+    
+    # Fast indexed range check; the bookings_no_overlap constraint settles races
+    if await bookings_repo.has_overlap(
+        db,
+        service["provider_id"],
+        booking.scheduled_at.isoformat(),
+        ends_at.isoformat()
+    ):
+        raise overlap_conflict()
     
     # Prepare booking data and convert datetime to string
     booking_data = {
         "service_id": booking.service_id,
         "scheduled_at": booking.scheduled_at.isoformat(),
         "notes": booking.notes,
-        "client_id": user.id,
+        "client_id": user["id"],
         "provider_id": service["provider_id"],
         "status": "pending",  # Simple pending status without payment
         "total_price": service["price"]
@@ -87,14 +129,18 @@ async def create_booking(
     print(f"Creating booking with data: {booking_data}")
     
     # Create the booking
-    response = supabase.table("bookings").insert(booking_data).execute()
+    try:
+        created_booking = await bookings_repo.create(db, booking_data)
+    except APIError as e:
+        if e.code == bookings_repo.OVERLAP_VIOLATION:
+            raise overlap_conflict()
+        raise
     
-    if not hasattr(response, 'data') or not response.data:
+    if not created_booking:
         raise HTTPException(status_code=500, detail="Failed to create booking")
     
-    created_booking = response.data[0]
-    
     print(f"Created booking {created_booking['id']} with pending status")
+    availability.invalidate(created_booking["provider_id"])
     
     return created_booking
 
@@ -102,21 +148,18 @@ async def create_booking(
 async def update_booking_status(
     booking_id: str,
     status_update: BookingStatusUpdate,
-    user = Depends(get_current_user)
+    user = Depends(get_current_user),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
     """Provider accepts or rejects a booking"""
-    supabase = get_supabase()
-    
     # Get booking details
-    booking_response = supabase.table("bookings").select("*").eq("id", booking_id).single().execute()
+    booking = await bookings_repo.get_by_id(db, booking_id, BOOKING_COLUMNS)
     
-    if not hasattr(booking_response, 'data') or not booking_response.data:
+    if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
-    booking = booking_response.data
-    
     # Verify user is the provider for this booking
-    if booking["provider_id"] != user.id:
+    if booking["provider_id"] != user["id"]:
         raise HTTPException(status_code=403, detail="Not authorized to update this booking")
     
     # Check if booking can be updated
@@ -133,77 +176,133 @@ async def update_booking_status(
         update_data["notes"] = status_update.notes
     
     # Update the booking
-    response = supabase.table("bookings").update(update_data).eq("id", booking_id).execute()
+    updated_booking = await bookings_repo.update(db, booking_id, update_data)
     
-    if not hasattr(response, 'data') or not response.data:
+    if not updated_booking:
         raise HTTPException(status_code=500, detail="Failed to update booking")
     
-    updated_booking = response.data[0]
-    
     print(f"Updated booking {booking_id} status to {status_update.status}")
+    availability.invalidate(booking["provider_id"])
     
     return updated_booking
 
+@router.post("/status", response_model=List[BookingStatusResult])
+async def update_booking_statuses(
+    batch: BookingStatusBatch,
+    user = Depends(get_current_user),
+    db: AsyncPostgrestClient = Depends(get_db)
+):
+    """Provider accepts or rejects several pending bookings at once"""
+    # Results by position; entries settled before any write are filled in first
+    outcomes: List[Optional[BookingStatusResult]] = [None] * len(batch.updates)
+    results = {}
+    groups = {}
+    seen = set()
+    
+    for index, item in enumerate(batch.updates):
+        if item.booking_id in seen:
+            outcomes[index] = BookingStatusResult(
+                booking_id=item.booking_id, ok=False, error="Duplicate booking id"
+            )
+            continue
+        seen.add(item.booking_id)
+        
+        if item.status not in PROVIDER_STATUSES:
+            outcomes[index] = BookingStatusResult(
+                booking_id=item.booking_id, ok=False, error="Invalid status"
+            )
+        else:
+            groups.setdefault(item.status, []).append(item.booking_id)
+    
+    # One filtered update per target status (at most two), run concurrently;
+    # only this provider's pending bookings match
+    now = datetime.utcnow().isoformat()
+    group_updates = []
+    for new_status, booking_ids in groups.items():
+        update_data = {"status": new_status, "updated_at": now}
+        if batch.notes:
+            update_data["notes"] = batch.notes
+        group_updates.append(bookings_repo.update_many(
+            db, booking_ids, update_data, provider_id=user["id"], status="pending"
+        ))
+    updated = [b for group in await asyncio.gather(*group_updates) for b in group]
+    
+    for booking in updated:
+        results[booking["id"]] = BookingStatusResult(
+            booking_id=booking["id"], ok=True, status=booking["status"]
+        )
+    
+    # Look up why the remaining bookings did not qualify
+    skipped = [booking_id for ids in groups.values() for booking_id in ids if booking_id not in results]
+    existing = {
+        b["id"]: b for b in await bookings_repo.get_many(db, skipped, "id,provider_id,status")
+    }
+    for booking_id in skipped:
+        booking = existing.get(booking_id)
+        if not booking:
+            error = "Booking not found"
+        elif booking["provider_id"] != user["id"]:
+            error = "Not authorized to update this booking"
+        else:
+            error = "Booking cannot be updated in current status"
+        results[booking_id] = BookingStatusResult(booking_id=booking_id, ok=False, error=error)
+    
+    if updated:
+        logger.info(f"Updated {len(updated)} of {len(batch.updates)} bookings for provider {user['id']}")
+        availability.invalidate(user["id"])
+    
+    return [
+        outcome or results[item.booking_id]
+        for outcome, item in zip(outcomes, batch.updates)
+    ]
+
 @router.get("/", response_model=List[BookingResponse])
 async def get_user_bookings(
+    response: Response,
     status: Optional[str] = None,
-    user = Depends(get_current_user)
+    role: Optional[str] = Query(None, regex="^(client|provider)$"),
+    scheduled_from: Optional[Union[datetime, date]] = Query(None, alias="from"),
+    scheduled_to: Optional[Union[datetime, date]] = Query(None, alias="to"),
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    user = Depends(get_current_user),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
-    """Get all bookings for the current user (as client or provider)"""
-    supabase = get_supabase()
-    
-    # First, get bookings where user is the client
-    client_query = supabase.table("bookings").select("*").eq("client_id", user.id)
-    
-    if status:
-        client_query = client_query.eq("status", status)
-    
-    client_bookings_response = client_query.execute()
-    client_bookings = client_bookings_response.data if hasattr(client_bookings_response, 'data') else []
-    
-    # Then, get bookings where user is the provider
-    provider_query = supabase.table("bookings").select("*").eq("provider_id", user.id)
-    
-    if status:
-        provider_query = provider_query.eq("status", status)
-    
-    provider_bookings_response = provider_query.execute()
-    provider_bookings = provider_bookings_response.data if hasattr(provider_bookings_response, 'data') else []
-    
-    # Combine and deduplicate
-    all_bookings = client_bookings + provider_bookings
-    
-    # Remove duplicates based on booking ID
-    seen_ids = set()
-    unique_bookings = []
-    for booking in all_bookings:
-        if booking["id"] not in seen_ids:
-            seen_ids.add(booking["id"])
-            unique_bookings.append(booking)
-    
-    # Sort by created_at (most recent first)
-    unique_bookings.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-    
-    return unique_bookings
+    """Get all bookings for the current user (as client, provider or both), most recent first"""
+    # A plain date as the upper bound includes the whole day
+    if isinstance(scheduled_to, date) and not isinstance(scheduled_to, datetime):
+        scheduled_to = datetime.combine(scheduled_to, time.max)
+    
+    # One query covers both sides of the booking; sorting and paging happen server-side
+    bookings = await bookings_repo.list_for_user(
+        db,
+        user["id"],
+        role=role,
+        status=status,
+        scheduled_from=scheduled_from.isoformat() if scheduled_from else None,
+        scheduled_to=scheduled_to.isoformat() if scheduled_to else None,
+        after=decode_cursor(cursor),
+        limit=limit,
+        columns=BOOKING_COLUMNS
+    )
+    
+    return paginate(bookings, limit, response)
 
 @router.get("/{booking_id}", response_model=BookingResponse)
 async def get_booking(
     booking_id: str,
-    user = Depends(get_current_user)
+    user = Depends(get_current_user),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
     """Get a specific booking"""
-    supabase = get_supabase()
-    
     # Get the booking
-    booking_response = supabase.table("bookings").select("*").eq("id", booking_id).single().execute()
+    booking = await bookings_repo.get_by_id(db, booking_id, BOOKING_COLUMNS)
     
-    if not hasattr(booking_response, 'data') or not booking_response.data:
+    if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
-    booking = booking_response.data
-    
     # Verify user has access to this booking (as client or provider)
-    if booking["client_id"] != user.id and booking["provider_id"] != user.id:
+    if booking["client_id"] != user["id"] and booking["provider_id"] != user["id"]:
         raise HTTPException(status_code=403, detail="Not authorized to view this booking")
     
     return booking
@@ -212,21 +311,18 @@ async def get_booking(
 async def update_booking(
     booking_id: str,
     booking: BookingUpdate,
-    user = Depends(get_current_user)
+    user = Depends(get_current_user),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
     """Update a booking (only by client and only certain fields)"""
-    supabase = get_supabase()
-    
     # Get the existing booking
-    existing_response = supabase.table("bookings").select("*").eq("id", booking_id).single().execute()
+    existing_booking = await bookings_repo.get_by_id(db, booking_id, BOOKING_COLUMNS)
     
-    if not hasattr(existing_response, 'data') or not existing_response.data:
+    if not existing_booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
-    existing_booking = existing_response.data
-    
     # Verify user is the client for this booking
-    if existing_booking["client_id"] != user.id:
+    if existing_booking["client_id"] != user["id"]:
         raise HTTPException(status_code=403, detail="Not authorized to update this booking")
     
     # Check if booking can be updated (only pending bookings)
@@ -237,37 +333,54 @@ async def update_booking(
     update_data = {"updated_at": datetime.utcnow().isoformat()}
     
     if booking.scheduled_at:
+        # The trigger re-derives ends_at from the service's current duration
+        service = await services_repo.get_by_id(db, existing_booking["service_id"], "duration_minutes")
+        ends_at = booking_end(service, booking.scheduled_at)
+        
+        if await bookings_repo.has_overlap(
+            db,
+            existing_booking["provider_id"],
+            booking.scheduled_at.isoformat(),
+            ends_at.isoformat(),
+            exclude_id=booking_id
+        ):
+            raise overlap_conflict()
+        
         update_data["scheduled_at"] = booking.scheduled_at.isoformat()
     
     if booking.notes is not None:
         update_data["notes"] = booking.notes
     
     # Update the booking
-    response = supabase.table("bookings").update(update_data).eq("id", booking_id).execute()
+    try:
+        updated_booking = await bookings_repo.update(db, booking_id, update_data)
+    except APIError as e:
+        if e.code == bookings_repo.OVERLAP_VIOLATION:
+            raise overlap_conflict()
+        raise
     
-    if not hasattr(response, 'data') or not response.data:
+    if not updated_booking:
         raise HTTPException(status_code=500, detail="Failed to update booking")
     
-    return response.data[0]
+    availability.invalidate(existing_booking["provider_id"])
+    
+    return updated_booking
 
 @router.delete("/{booking_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def cancel_booking(
     booking_id: str,
-    user = Depends(get_current_user)
+    user = Depends(get_current_user),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
     """Cancel a booking"""
-    supabase = get_supabase()
-    
     # Get the booking
-    booking_response = supabase.table("bookings").select("*").eq("id", booking_id).single().execute()
+    booking = await bookings_repo.get_by_id(db, booking_id, BOOKING_COLUMNS)
     
-    if not hasattr(booking_response, 'data') or not booking_response.data:
+    if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
-    booking = booking_response.data
-    
     # Verify user has permission to cancel (client or provider)
-    if booking["client_id"] != user.id and booking["provider_id"] != user.id:
+    if booking["client_id"] != user["id"] and booking["provider_id"] != user["id"]:
         raise HTTPException(status_code=403, detail="Not authorized to cancel this booking")
     
     # Check if booking can be cancelled
@@ -280,11 +393,12 @@ async def cancel_booking(
         "updated_at": datetime.utcnow().isoformat()
     }
     
-    response = supabase.table("bookings").update(update_data).eq("id", booking_id).execute()
+    cancelled_booking = await bookings_repo.update(db, booking_id, update_data)
     
-    if not hasattr(response, 'data') or not response.data:
+    if not cancelled_booking:
         raise HTTPException(status_code=500, detail="Failed to cancel booking")
     
     print(f"Cancelled booking {booking_id}")
+    availability.invalidate(booking["provider_id"])
     
     return None 
\ No newline at end of file
@@ -1,17 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+import asyncio
+from pydantic import BaseModel, validator
 from typing import List, Optional, Dict, Any
-import os
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from postgrest import AsyncPostgrestClient
+from core.config import NEARBY_MAX_RADIUS_KM
+from core.etag import ETagRoute
+from core.projection import columns
+from core.supabase import get_db
+from auth.verify_supabase_token import get_current_user
+from catalog import catalog, provider_categories
+from geo import locate_provider, provider_locations
+from repositories import users as users_repo
+from repositories import provider_profiles as profiles_repo
+from scheduling import availability, free_slots
 
 # Load environment variables
 load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
 # Models
 class ProviderProfileBase(BaseModel):
     bio: Optional[str] = None
@@ -19,6 +27,17 @@ class ProviderProfileBase(BaseModel):
     location: Optional[str] = None
     specialties: Optional[List[str]] = None
     availability: Optional[Dict[str, Any]] = None
+    # IANA timezone of the availability windows, e.g. "America/Vancouver"
+    timezone: Optional[str] = None
+
+    @validator('timezone')
+    def timezone_must_exist(cls, v):
+        if v is not None:
+            try:
+                ZoneInfo(v)
+            except (ZoneInfoNotFoundError, ValueError):
+                raise ValueError('Unknown timezone')
+        return v
 
 class ProviderProfileCreate(ProviderProfileBase):
     pass
@@ -31,38 +50,38 @@ class ProviderProfileResponse(ProviderProfileBase):
     user_id: str
     ratings_average: float
     ratings_count: int
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     
     class Config:
         orm_mode = True
 
-# Router
-router = APIRouter()
-security = HTTPBearer()
+class NearbyProvider(ProviderProfileResponse):
+    full_name: Optional[str] = None
+    distance_km: float
+
+class TimeSlot(BaseModel):
+    start: datetime
+    end: datetime
+
+# Longest range of days a slot query may cover
+MAX_SLOT_RANGE_DAYS = 31
 
-def get_supabase() -> Client:
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+# Columns a profile read selects
+PROFILE_COLUMNS = columns(ProviderProfileResponse)
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    supabase = get_supabase()
-    try:
-        user = supabase.auth.get_user(credentials.credentials)
-        return user.user
-    except Exception as e:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+# Router (GET responses carry ETags for conditional requests)
+router = APIRouter(route_class=ETagRoute)
 
 @router.post("/", response_model=ProviderProfileResponse, status_code=status.HTTP_201_CREATED)
 async def create_provider_profile(
     profile: ProviderProfileCreate,
-    user = Depends(get_current_user)
+    user = Depends(get_current_user),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
     """Create a new provider profile"""
-    supabase = get_supabase()
-    
     # Check if user is a provider
-    user_response = supabase.table("users").select("*").eq("id", user.id).execute()
-    
-    
-    user_data = user_response.data[0] if user_response.data else None
+    user_data = await users_repo.get_cached(db, user["id"])
 
     if not user_data:
         raise HTTPException(status_code=404, detail="User not found")
@@ -71,9 +90,9 @@ async def create_provider_profile(
         raise HTTPException(status_code=403, detail="Only providers can create provider profiles")
     
     # Check if profile already exists
-    existing_profile = supabase.table("provider_profiles").select("*").eq("user_id", user.id).execute()
+    existing_profile = await profiles_repo.get_by_user_id(db, user["id"], "id")
     
-    if hasattr(existing_profile, 'data') and existing_profile.data:
+    if existing_profile:
         raise HTTPException(status_code=400, detail="Provider profile already exists")
     
     # Create provider profile
@@ -85,48 +104,125 @@ async def create_provider_profile(
     else:
         print("No availability data in profile creation")
     
-    profile_data["user_id"] = user.id
+    profile_data["user_id"] = user["id"]
     # Set default values for new provider profiles
     profile_data["ratings_average"] = 0.0
     profile_data["ratings_count"] = 0
+    profile_data["latitude"], profile_data["longitude"] = await locate_provider(
+        db, user["id"], profile_data.get("location")
+    )
     
     print(f"Final profile data being inserted: {profile_data}")
-    response = supabase.table("provider_profiles").insert(profile_data).execute()
+    result_data = await profiles_repo.create(db, profile_data)
     
-    if not hasattr(response, 'data') or not response.data:
+    if not result_data:
         raise HTTPException(status_code=500, detail="Failed to create provider profile")
     
-    
-    result_data = response.data[0]
     print(f"Created profile result: {result_data}")
+    availability.invalidate(user["id"])
+    provider_locations.upsert(user["id"], result_data.get("latitude"), result_data.get("longitude"))
     return result_data
 
+@router.get("/nearby", response_model=List[NearbyProvider])
+async def get_nearby_providers(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius: float = Query(25, gt=0, le=NEARBY_MAX_RADIUS_KM),
+    category: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncPostgrestClient = Depends(get_db)
+):
+    """Get the providers within radius km of a point, nearest first"""
+    await provider_locations.ensure_loaded(db)
+    
+    provider_ids = None
+    if category:
+        await catalog.ensure_loaded(db)
+        provider_ids = provider_categories.providers(category)
+    
+    nearest = provider_locations.nearby(lat, lng, radius, limit, provider_ids)
+    
+    if not nearest:
+        return []
+    
+    # Fetch profiles and names for the page in two batched queries
+    ids = [provider_id for provider_id, _ in nearest]
+    profiles_data, users_data = await asyncio.gather(
+        profiles_repo.get_many_by_user_id(db, ids, PROFILE_COLUMNS),
+        users_repo.get_many(db, ids, "id,full_name")
+    )
+    profiles_by_user = {p["user_id"]: p for p in profiles_data}
+    names = {u["id"]: u.get("full_name") for u in users_data}
+    
+    return [
+        {
+            **profiles_by_user[provider_id],
+            "full_name": names.get(provider_id),
+            "distance_km": round(distance, 2)
+        }
+        for provider_id, distance in nearest
+        if provider_id in profiles_by_user
+    ]
+
 @router.get("/{provider_id}", response_model=ProviderProfileResponse)
-async def get_provider_profile(provider_id: str):
+async def get_provider_profile(
+    provider_id: str,
+    db: AsyncPostgrestClient = Depends(get_db)
+):
     """Get a provider's profile"""
-    supabase = get_supabase()
+    profile_data = await profiles_repo.get_by_user_id(db, provider_id, PROFILE_COLUMNS)
     
-    response = supabase.table("provider_profiles").select("*").eq("user_id", provider_id).execute()
-    
-    if not hasattr(response, 'data') or not response.data:
+    if not profile_data:
         raise HTTPException(status_code=404, detail="Provider profile not found")
     
-    profile_data = response.data[0]
     return profile_data
 
+@router.get("/{provider_id}/slots", response_model=List[TimeSlot])
+async def get_provider_slots(
+    provider_id: str,
+    slots_from: date = Query(..., alias="from"),
+    slots_to: Optional[date] = Query(None, alias="to"),
+    duration: int = Query(60, ge=5, le=24 * 60),
+    step: int = Query(30, ge=5, le=24 * 60),
+    db: AsyncPostgrestClient = Depends(get_db)
+):
+    """Get a provider's free time slots between two dates (inclusive)"""
+    slots_to = slots_to or slots_from
+    
+    if slots_to < slots_from:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (slots_to - slots_from).days >= MAX_SLOT_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Slot queries are limited to {MAX_SLOT_RANGE_DAYS} days")
+    
+    schedule = await availability.get_schedule(db, provider_id)
+    
+    if schedule is None:
+        raise HTTPException(status_code=404, detail="Provider profile not found")
+    
+    busy = await availability.get_busy(db, provider_id, schedule.timezone, slots_from, slots_to)
+    
+    slots = free_slots(
+        schedule.windows,
+        busy,
+        slots_from,
+        slots_to,
+        timedelta(minutes=duration),
+        timedelta(minutes=step)
+    )
+    
+    # Slots are computed on the provider's wall clock and returned with its offset
+    tz = schedule.timezone
+    return [{"start": start.replace(tzinfo=tz), "end": end.replace(tzinfo=tz)} for start, end in slots]
+
 @router.put("/", response_model=ProviderProfileResponse)
 async def update_provider_profile(
     profile: ProviderProfileUpdate,
-    user = Depends(get_current_user)
+    user = Depends(get_current_user),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
     """Update the current provider's profile"""
-    supabase = get_supabase()
-    
     # Check if user is a provider
-    user_response = supabase.table("users").select("*").eq("id", user.id).execute()
-    
-    
-    user_data = user_response.data[0] if user_response.data else None
+    user_data = await users_repo.get_cached(db, user["id"])
 
     if not user_data:
         raise HTTPException(status_code=404, detail="User not found")
@@ -135,14 +231,20 @@ async def update_provider_profile(
         raise HTTPException(status_code=403, detail="Only providers can update provider profiles")
     
     # Check if profile exists
-    existing_profile = supabase.table("provider_profiles").select("*").eq("user_id", user.id).execute()
+    existing_profile = await profiles_repo.get_by_user_id(db, user["id"], "id")
     
-    if not hasattr(existing_profile, 'data') or not existing_profile.data:
+    if not existing_profile:
         raise HTTPException(status_code=404, detail="Provider profile not found")
     
     # Update provider profile
     profile_data = profile.dict(exclude_unset=True)
     
+    # A new location is geocoded again
+    if "location" in profile_data:
+        profile_data["latitude"], profile_data["longitude"] = await locate_provider(
+            db, user["id"], profile_data["location"]
+        )
+    
     # Debug availability data
     if profile_data.get("availability"):
         print(f"Updating profile with availability data: {profile_data['availability']}")
@@ -152,12 +254,11 @@ async def update_provider_profile(
     
     # Log the data being sent to the database
     print(f"Updating profile with data: {profile_data}")
-    response = supabase.table("provider_profiles").update(profile_data).eq("user_id", user.id).execute()
+    updated_profile = await profiles_repo.update_by_user_id(db, user["id"], profile_data)
     
-    if not hasattr(response, 'data') or not response.data:
+    if not updated_profile:
         raise HTTPException(status_code=500, detail="Failed to update provider profile")
     
-    updated_profile = response.data[0]
     print(f"Updated profile result: {updated_profile}")
     
     # Verify availability was saved
@@ -166,4 +267,7 @@ async def update_provider_profile(
     else:
         print("Warning: No availability data in updated profile")
     
+    availability.invalidate(user["id"])
+    provider_locations.upsert(user["id"], updated_profile.get("latitude"), updated_profile.get("longitude"))
+    
     return updated_profile
@@ -1,17 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from pydantic import BaseModel
 from typing import List, Optional
-import os
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from postgrest import AsyncPostgrestClient
+from core.config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from core.pagination import decode_cursor, paginate
+from core.etag import ETagRoute
+from core.projection import columns
+from core.supabase import get_db
+from auth.verify_supabase_token import get_current_user
+from repositories import bookings as bookings_repo
+from repositories import reviews as reviews_repo
 
 # Load environment variables
 load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
 # Models
 class ReviewBase(BaseModel):
     booking_id: str
@@ -31,39 +34,27 @@ class ReviewResponse(ReviewBase):
     class Config:
         orm_mode = True
 
-# Router
-router = APIRouter()
-security = HTTPBearer()
-
-def get_supabase() -> Client:
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+# Columns the review lists select
+REVIEW_COLUMNS = columns(ReviewResponse)
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    supabase = get_supabase()
-    try:
-        user = supabase.auth.get_user(credentials.credentials)
-        return user.user
-    except Exception as e:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+# Router (GET responses carry ETags for conditional requests)
+router = APIRouter(route_class=ETagRoute)
 
 @router.post("/", response_model=ReviewResponse, status_code=status.HTTP_201_CREATED)
 async def create_review(
     review: ReviewCreate,
-    user = Depends(get_current_user)
+    user = Depends(get_current_user),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
     """Create a review for a completed booking"""
-    supabase = get_supabase()
-    
     # Get the booking
-    booking_response = supabase.table("bookings").select("*").eq("id", review.booking_id).single().execute()
+    booking = await bookings_repo.get_by_id(db, review.booking_id, "id,client_id,provider_id,service_id,status")
     
-    if not hasattr(booking_response, 'data') or not booking_response.data:
+    if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
-    booking = booking_response.data
-    
     # Check if user is the client of this booking
-    if booking["client_id"] != user.id:
+    if booking["client_id"] != user["id"]:
         raise HTTPException(status_code=403, detail="Only the client can review a booking")
     
     # Check if booking is completed
@@ -75,56 +66,58 @@ async def create_review(
         raise HTTPException(status_code=400, detail="Rating must be between 1 and 5")
     
     # Check if review already exists
-    existing_review = supabase.table("reviews").select("*").eq("booking_id", review.booking_id).execute()
+    existing_review = await reviews_repo.get_by_booking_id(db, review.booking_id)
     
-    if hasattr(existing_review, 'data') and existing_review.data:
+    if existing_review:
         raise HTTPException(status_code=400, detail="Review already exists for this booking")
     
     # Create review
     review_data = review.dict()
-    review_data["client_id"] = user.id
+    review_data["client_id"] = user["id"]
     review_data["provider_id"] = booking["provider_id"]
     review_data["service_id"] = booking["service_id"]
     
-    response = supabase.table("reviews").insert(review_data).execute()
+    created_review = await reviews_repo.create(db, review_data)
     
-    if not hasattr(response, 'data') or not response.data:
+    if not created_review:
         raise HTTPException(status_code=500, detail="Failed to create review")
     
-    # Update provider's average rating
-    provider_id = booking["provider_id"]
-    reviews_response = supabase.table("reviews").select("rating").eq("provider_id", provider_id).execute()
-    
-    if hasattr(reviews_response, 'data') and reviews_response.data:
-        ratings = [r["rating"] for r in reviews_response.data]
-        avg_rating = sum(ratings) / len(ratings)
-        
-        # Update provider profile
-        supabase.table("provider_profiles").update({
-            "ratings_average": avg_rating,
-            "ratings_count": len(ratings)
-        }).eq("user_id", provider_id).execute()
-    
-    return response.data[0]
+    # The provider's ratings_average/ratings_count are updated atomically by the
+    # reviews_apply_rating trigger in the same transaction as the insert
+    return created_review
 
 @router.get("/provider/{provider_id}", response_model=List[ReviewResponse])
-async def get_provider_reviews(provider_id: str):
+async def get_provider_reviews(
+    provider_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    db: AsyncPostgrestClient = Depends(get_db)
+):
     """Get all reviews for a provider"""
-    supabase = get_supabase()
-    
-    response = supabase.table("reviews").select("*").eq("provider_id", provider_id).execute()
-    
-    if hasattr(response, 'data'):
-        return response.data
-    return []
+    reviews = await reviews_repo.list_for_provider(
+        db,
+        provider_id,
+        after=decode_cursor(cursor),
+        limit=limit,
+        columns=REVIEW_COLUMNS
+    )
+    return paginate(reviews, limit, response)
 
 @router.get("/service/{service_id}", response_model=List[ReviewResponse])
-async def get_service_reviews(service_id: str):
+async def get_service_reviews(
+    service_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    db: AsyncPostgrestClient = Depends(get_db)
+):
     """Get all reviews for a service"""
-    supabase = get_supabase()
-    
-    response = supabase.table("reviews").select("*").eq("service_id", service_id).execute()
-    
-    if hasattr(response, 'data'):
-        return response.data
-    return []
+    reviews = await reviews_repo.list_for_service(
+        db,
+        service_id,
+        after=decode_cursor(cursor),
+        limit=limit,
+        columns=REVIEW_COLUMNS
+    )
+    return paginate(reviews, limit, response)
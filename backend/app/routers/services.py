@@ -1,16 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel
-import os
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse
+from typing import List, Optional, Dict, Any, Tuple
+from pydantic import BaseModel, ValidationError
+import asyncio
+import logging
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from postgrest import AsyncPostgrestClient
+from postgrest.exceptions import APIError
+from core.config import EXPORT_PAGE_SIZE, IMPORT_BATCH_SIZE, IMPORT_MAX_ERRORS, PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from core.pagination import decode_cursor, paginate
+from core.etag import ETagRoute
+from core.projection import columns
+from core.streaming import export_response, iter_pages, iter_records, request_format
+from core.supabase import get_db
+from auth.verify_supabase_token import get_current_user
+from repositories import services as services_repo
+from repositories import users as users_repo
+from repositories import provider_profiles as profiles_repo
+from catalog import catalog, facet_index, listing_index, title_index, price_index, provider_categories, search_index
 
 # Load environment variables
 load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+logger = logging.getLogger(__name__)
 
 # Models
 class ServiceBase(BaseModel):
@@ -18,6 +30,7 @@ class ServiceBase(BaseModel):
     description: str
     price: float
     category: str
+    duration_minutes: int = 60
     
 class ServiceCreate(ServiceBase):
     pass
@@ -27,6 +40,7 @@ class ServiceUpdate(BaseModel):
     description: Optional[str] = None
     price: Optional[float] = None
     category: Optional[str] = None
+    duration_minutes: Optional[int] = None
     is_active: Optional[bool] = None
     
 class ServiceResponse(ServiceBase):
@@ -37,296 +51,441 @@ class ServiceResponse(ServiceBase):
     class Config:
         orm_mode = True
 
-# Router
-router = APIRouter()
-security = HTTPBearer()
+class ServiceSearchResult(ServiceResponse):
+    score: float
 
-def get_supabase() -> Client:
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+class ServiceImportError(BaseModel):
+    line: int
+    error: str
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    supabase = get_supabase()
-    try:
-        user = supabase.auth.get_user(credentials.credentials)
-        return user.user
-    except Exception as e:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+class ServiceImportResult(BaseModel):
+    created: int
+    failed: int
+    # The first IMPORT_MAX_ERRORS failed rows; failed counts them all
+    errors: List[ServiceImportError]
+
+# Columns the read endpoints select: the response model plus the pagination key
+SERVICE_COLUMNS = columns(ServiceResponse, "created_at")
+# Fields written by exports, in column order
+EXPORT_FIELDS = SERVICE_COLUMNS.split(",")
+
+# Longest title the by-title lookup accepts
+MAX_TITLE_QUERY_LENGTH = 500
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in e['loc'])}: {e['msg']}" for e in error.errors()
+    )
+
+# Router (GET responses carry ETags for conditional requests)
+router = APIRouter(route_class=ETagRoute)
 
 @router.get("/", response_model=List[ServiceResponse])
 async def get_services(
+    response: Response,
     category: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
-    is_active: bool = True
+    is_active: bool = True,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
-    """Get all services with optional filtering"""
-    supabase = get_supabase()
-    
-    # Start with a base query
-    query = supabase.table("services").select("*").eq("is_active", is_active)
-    
-    # Apply filters if provided
-    if category:
-        query = query.eq("category", category)
-    if min_price is not None:
-        query = query.gte("price", min_price)
-    if max_price is not None:
-        query = query.lte("price", max_price)
-    
-    # Execute the query
-    response = query.execute()
-    
-    if hasattr(response, 'data'):
-        return response.data
-    return []
+    """Get all services with optional filtering, newest first, one page at a time"""
+    after = decode_cursor(cursor)
+    
+    # Active services are listed from the in-memory catalog
+    if is_active:
+        await catalog.ensure_loaded(db)
+        services = listing_index.page(
+            after, limit, category=category, min_price=min_price, max_price=max_price
+        )
+    else:
+        services = await services_repo.list_services(
+            db,
+            is_active=False,
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            after=after,
+            limit=limit,
+            columns=SERVICE_COLUMNS
+        )
+    return paginate(services, limit, response)
 
 @router.get("/providers", response_model=List[Dict[str, Any]])
 async def get_providers_by_service(
     service: Optional[str] = None,
-    category: Optional[str] = None
+    category: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
     """Get all providers that offer a specific service or category"""
-    supabase = get_supabase()
-    
-    print(f"Searching for providers with service: {service}, category: {category}")
-    
-    # We need to find services that match the given service name and/or category
-    services_query = supabase.table("services").select("*").eq("is_active", True)
-    
-    # Apply category filter if provided
-    if category:
-        services_query = services_query.eq("category", category)
+    # Providers and their active services come from the in-memory catalog
+    await catalog.ensure_loaded(db)
+    candidates = provider_categories.providers(category) if category else provider_categories.all_providers()
+    
+    # Keep the providers that offer a service matching the name (case-insensitive)
+    service_name = service.lower() if service else None
+    services_by_provider: Dict[str, List[Dict[str, Any]]] = {}
+    for provider_id in candidates:
+        offered = [
+            s for s in provider_categories.services(provider_id)
+            if category is None or s.get("category") == category
+        ]
+        if service_name is None or any(service_name in s["title"].lower() for s in offered):
+            services_by_provider[provider_id] = offered
     
-    # Execute the query to get all active services (possibly filtered by category)
-    services_response = services_query.execute()
+    # Page over the providers in a stable order
+    provider_ids = sorted(services_by_provider)[offset:offset + limit]
+    logger.debug(
+        f"Providers for service {service!r}, category {category!r}: "
+        f"{len(services_by_provider)} found, {len(provider_ids)} in page"
+    )
     
-    if not hasattr(services_response, 'data') or not services_response.data:
-        print(f"No services found matching criteria")
+    if not provider_ids:
         return []
     
-    # If service name is provided, filter the results
-    if service:
-        print(f"Filtering services by name: {service}")
-        # Case-insensitive match for service name
-        filtered_services = [
-            s for s in services_response.data 
-            if s["title"].lower() == service.lower() or service.lower() in s["title"].lower()
-        ]
-        services_data = filtered_services
-        print(f"Found {len(filtered_services)} services matching name")
-    else:
-        services_data = services_response.data
-    
-    print(f"Found {len(services_data)} matching services")
-    
-    # Get the unique provider IDs
-    provider_ids = list(set([service["provider_id"] for service in services_data]))
-    print(f"Found {len(provider_ids)} unique providers: {provider_ids}")
+    # Fetch users and provider profiles for the whole page in two batched queries
+    users_data, profiles_data = await asyncio.gather(
+        users_repo.get_many(db, provider_ids),
+        profiles_repo.get_many_by_user_id(db, provider_ids)
+    )
+    users_by_id = {u["id"]: u for u in users_data}
+    profiles_by_user = {p["user_id"]: p for p in profiles_data}
     
-    # Now fetch provider profiles
     providers = []
     for provider_id in provider_ids:
-        # Get user data
-        user_response = supabase.table("users").select("*").eq("id", provider_id).single().execute()
+        user_data = users_by_id.get(provider_id)
         
-        if not hasattr(user_response, 'data') or not user_response.data:
-            print(f"No user data found for provider ID: {provider_id}")
+        if not user_data:
+            logger.warning(f"No user data found for provider ID: {provider_id}")
             continue
         
-        user_data = user_response.data
-        print(f"Found user data for {user_data.get('full_name', 'unknown')}")
-        
-        # Get provider profile data
-        profile_response = supabase.table("provider_profiles").select("*").eq("user_id", provider_id).single().execute()
-        
-        profile_data = {}
-        if hasattr(profile_response, 'data') and profile_response.data:
-            profile_data = profile_response.data
-            print(f"Found profile data for provider ID: {provider_id}")
-        else:
-            print(f"No profile data found for provider ID: {provider_id}")
-        
-        # Get the services offered by this provider
-        provider_services = [s for s in services_response.data if s["provider_id"] == provider_id]
-        print(f"Provider offers {len(provider_services)} services")
-        
         # Combine user data, profile data, and services
         provider_info = {
             **user_data,
-            **profile_data,
-            "services": provider_services
+            **profiles_by_user.get(provider_id, {}),
+            "services": services_by_provider[provider_id]
         }
         
         providers.append(provider_info)
     
-    print(f"Returning {len(providers)} providers")
-    return providers
+    # Rows straight from PostgREST are already JSON-native, so skip jsonable_encoder
+    return ORJSONResponse(providers)
+
+@router.get("/price-ranges", response_model=List[Dict[str, Any]])
+async def get_price_ranges(
+    category: Optional[str] = None,
+    db: AsyncPostgrestClient = Depends(get_db)
+):
+    """Get the price range (min, max, count, median) of active services per category"""
+    await catalog.ensure_loaded(db)
+    
+    if category:
+        price_range = price_index.summary(category)
+        return [price_range] if price_range else []
+    
+    return price_index.summaries()
+
+@router.get("/facets", response_model=Dict[str, Any])
+async def get_service_facets(
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    buckets: int = Query(10, ge=1, le=50),
+    db: AsyncPostgrestClient = Depends(get_db)
+):
+    """Get the count, category counts and price histogram of active services for a set of filters"""
+    await catalog.ensure_loaded(db)
+    
+    # Each facet ignores its own filter, so the UI can offer the alternatives
+    return facet_index.facets(
+        category=category,
+        min_price=min_price,
+        max_price=max_price,
+        buckets=buckets
+    )
+
+@router.get("/search", response_model=List[ServiceSearchResult])
+async def search_services(
+    q: str = Query(..., min_length=1, max_length=200),
+    category: Optional[str] = None,
+    prefix: bool = True,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncPostgrestClient = Depends(get_db)
+):
+    """Search active services by title and description, best matches first"""
+    await catalog.ensure_loaded(db)
+    
+    # With prefix on, the last word also matches longer words (search-as-you-type)
+    results = search_index.search(q, limit=limit, category=category, prefix=prefix)
+    
+    return [{**service, "score": round(score, 4)} for service, score in results]
 
 @router.get("/provider/{provider_id}", response_model=List[ServiceResponse])
 async def get_provider_services(
     provider_id: str,
-    is_active: Optional[bool] = None
+    response: Response,
+    is_active: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
     """Get all services offered by a specific provider"""
-    supabase = get_supabase()
+    after = decode_cursor(cursor)
+    
+    # Active services are listed from the in-memory catalog
+    if is_active:
+        await catalog.ensure_loaded(db)
+        services = listing_index.page(after, limit, provider_id=provider_id)
+    else:
+        services = await services_repo.list_services(
+            db,
+            provider_id=provider_id,
+            is_active=is_active,
+            after=after,
+            limit=limit,
+            columns=SERVICE_COLUMNS
+        )
+    return paginate(services, limit, response)
+
+@router.get("/export")
+async def export_services(
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    provider_id: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    user = Depends(get_current_user),
+    db: AsyncPostgrestClient = Depends(get_db)
+):
+    """Stream services as NDJSON or CSV (Provider: own services, Admin: any)"""
+    # Get user profile to check role
+    user_data = await users_repo.get_cached(db, user["id"])
+    
+    if not user_data:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    if user_data.get("role") not in ["provider", "admin"]:
+        raise HTTPException(status_code=403, detail="Only providers and admins can export services")
+    
+    # Providers only ever export their own services
+    if user_data.get("role") != "admin":
+        provider_id = user["id"]
+    
+    async def fetch_page(after, limit):
+        return await services_repo.list_services(
+            db,
+            provider_id=provider_id,
+            is_active=is_active,
+            after=after,
+            limit=limit,
+            columns=SERVICE_COLUMNS
+        )
+    
+    # Pages are read from the database as the client consumes the stream
+    return export_response(iter_pages(fetch_page, EXPORT_PAGE_SIZE), format, EXPORT_FIELDS, "services")
+
+@router.post("/import", response_model=ServiceImportResult)
+async def import_services(
+    request: Request,
+    user = Depends(get_current_user),
+    db: AsyncPostgrestClient = Depends(get_db)
+):
+    """Create services from an NDJSON or CSV upload (Provider or Admin only)"""
+    fmt = request_format(request)
+    
+    # The role is checked once for the whole upload
+    user_data = await users_repo.get_cached(db, user["id"])
+    
+    if not user_data:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    if user_data.get("role") not in ["provider", "admin"]:
+        raise HTTPException(status_code=403, detail="Only providers and admins can create services")
     
-    # Start with a base query
-    query = supabase.table("services").select("*").eq("provider_id", provider_id)
+    created = 0
+    failed = 0
+    errors: List[ServiceImportError] = []
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+    
+    def fail(line_no: int, error: str) -> None:
+        nonlocal failed
+        failed += 1
+        if len(errors) < IMPORT_MAX_ERRORS:
+            errors.append(ServiceImportError(line=line_no, error=error))
+    
+    def inserted(services: List[Dict[str, Any]]) -> None:
+        nonlocal created
+        for created_service in services:
+            catalog.upsert(created_service)
+        created += len(services)
+    
+    async def flush() -> None:
+        try:
+            inserted(await services_repo.create_many(db, [data for _, data in batch]))
+        except APIError:
+            # The batch is one statement, so a rejected row fails all of it;
+            # retry row by row to tell which rows were at fault
+            for line_no, data in batch:
+                try:
+                    inserted(await services_repo.create_many(db, [data]))
+                except APIError as e:
+                    fail(line_no, e.message or "Failed to create service")
+        batch.clear()
+    
+    async for line_no, record, error in iter_records(request, fmt):
+        if error:
+            fail(line_no, error)
+            continue
+        
+        try:
+            service = ServiceCreate(**record)
+        except ValidationError as e:
+            fail(line_no, validation_message(e))
+            continue
+        
+        service_data = service.dict()
+        service_data["provider_id"] = user["id"]
+        service_data["is_active"] = True
+        batch.append((line_no, service_data))
+        
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await flush()
     
-    # Apply is_active filter if provided
-    if is_active is not None:
-        query = query.eq("is_active", is_active)
+    if batch:
+        await flush()
     
-    # Execute the query
-    response = query.execute()
+    logger.info(f"Imported {created} services for {user['id']}, {failed} rows failed")
     
-    if hasattr(response, 'data'):
-        return response.data
-    return []
+    return ServiceImportResult(created=created, failed=failed, errors=errors)
 
 @router.get("/{service_id}", response_model=ServiceResponse)
-async def get_service(service_id: str):
+async def get_service(service_id: str, db: AsyncPostgrestClient = Depends(get_db)):
     """Get a specific service by ID"""
-    supabase = get_supabase()
-    response = supabase.table("services").select("*").eq("id", service_id).single().execute()
+    # Active services are served from the in-memory catalog
+    await catalog.ensure_loaded(db)
+    service = catalog.get(service_id) or await services_repo.get_by_id(db, service_id, SERVICE_COLUMNS)
     
-    if not hasattr(response, 'data') or not response.data:
+    if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     
-    return response.data
+    return service
 
 @router.post("/", response_model=ServiceResponse, status_code=status.HTTP_201_CREATED)
 async def create_service(
     service: ServiceCreate,
-    user = Depends(get_current_user)
+    user = Depends(get_current_user),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
     """Create a new service (Provider or Admin only)"""
-    supabase = get_supabase()
-    
     # Get user profile to check role
-    user_response = supabase.table("users").select("*").eq("id", user.id).single().execute()
+    user_data = await users_repo.get_cached(db, user["id"])
     
-    if not hasattr(user_response, 'data') or not user_response.data:
+    if not user_data:
         raise HTTPException(status_code=404, detail="User not found")
     
-    user_data = user_response.data
-    
     # Only providers and admins can create services
     if user_data.get("role") not in ["provider", "admin"]:
         raise HTTPException(status_code=403, detail="Only providers and admins can create services")
     
     # Prepare service data
     service_data = service.dict()
-    service_data["provider_id"] = user.id
+    service_data["provider_id"] = user["id"]
     service_data["is_active"] = True
     
     # Create the service
-    response = supabase.table("services").insert(service_data).execute()
+    created_service = await services_repo.create(db, service_data)
     
-    if not hasattr(response, 'data') or not response.data:
+    if not created_service:
         raise HTTPException(status_code=500, detail="Failed to create service")
     
-    return response.data[0]
+    catalog.upsert(created_service)
+    
+    return created_service
 
 @router.put("/{service_id}", response_model=ServiceResponse)
 async def update_service(
     service_id: str,
     service: ServiceUpdate,
-    user = Depends(get_current_user)
+    user = Depends(get_current_user),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
     """Update a service (Provider owner or Admin only)"""
-    supabase = get_supabase()
-    
     # Check if service exists
-    service_response = supabase.table("services").select("*").eq("id", service_id).single().execute()
+    existing_service = await services_repo.get_by_id(db, service_id, "id,provider_id")
     
-    if not hasattr(service_response, 'data') or not service_response.data:
+    if not existing_service:
         raise HTTPException(status_code=404, detail="Service not found")
     
-    existing_service = service_response.data
-    
     # Get user profile to check role
-    user_response = supabase.table("users").select("*").eq("id", user.id).single().execute()
+    user_data = await users_repo.get_cached(db, user["id"])
     
-    if not hasattr(user_response, 'data') or not user_response.data:
+    if not user_data:
         raise HTTPException(status_code=404, detail="User not found")
     
-    user_data = user_response.data
-    
     # Check permissions - only the provider who created the service or admins can update it
-    if user_data.get("role") != "admin" and existing_service.get("provider_id") != user.id:
+    if user_data.get("role") != "admin" and existing_service.get("provider_id") != user["id"]:
         raise HTTPException(status_code=403, detail="Not authorized to update this service")
     
     # Prepare update data - only include fields that are actually provided
     update_data = {k: v for k, v in service.dict().items() if v is not None}
     
     # Update the service
-    response = supabase.table("services").update(update_data).eq("id", service_id).execute()
+    updated_service = await services_repo.update(db, service_id, update_data)
     
-    if not hasattr(response, 'data') or not response.data:
+    if not updated_service:
         raise HTTPException(status_code=500, detail="Failed to update service")
     
-    return response.data[0]
+    catalog.upsert(updated_service)
+    
+    return updated_service
 
 @router.delete("/{service_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_service(
     service_id: str,
-    user = Depends(get_current_user)
+    user = Depends(get_current_user),
+    db: AsyncPostgrestClient = Depends(get_db)
 ):
     """Delete a service (Provider owner or Admin only)"""
-    supabase = get_supabase()
-    
     # Check if service exists
-    service_response = supabase.table("services").select("*").eq("id", service_id).single().execute()
+    existing_service = await services_repo.get_by_id(db, service_id, "id,provider_id")
     
-    if not hasattr(service_response, 'data') or not service_response.data:
+    if not existing_service:
         raise HTTPException(status_code=404, detail="Service not found")
     
-    existing_service = service_response.data
-    
     # Get user profile to check role
-    user_response = supabase.table("users").select("*").eq("id", user.id).single().execute()
+    user_data = await users_repo.get_cached(db, user["id"])
     
-    if not hasattr(user_response, 'data') or not user_response.data:
+    if not user_data:
         raise HTTPException(status_code=404, detail="User not found")
     
-    user_data = user_response.data
-    
     # Check permissions - only the provider who created the service or admins can delete it
-    if user_data.get("role") != "admin" and existing_service.get("provider_id") != user.id:
+    if user_data.get("role") != "admin" and existing_service.get("provider_id") != user["id"]:
         raise HTTPException(status_code=403, detail="Not authorized to delete this service")
     
     # Delete the service
-    supabase.table("services").delete().eq("id", service_id).execute()
+    await services_repo.delete(db, service_id)
+    catalog.remove(service_id)
     
     return None
 
 @router.get("/by-title/{title}", response_model=Dict[str, Any])
-async def get_service_by_title(title: str):
+async def get_service_by_title(
+    title: str = Path(..., max_length=MAX_TITLE_QUERY_LENGTH),
+    db: AsyncPostgrestClient = Depends(get_db)
+):
     """Get a specific service by title"""
-    supabase = get_supabase()
-    
     print(f"Searching for service with title: {title}")
     
-    # Case-insensitive search for the service
-    response = supabase.table("services").select("*").eq("is_active", True).execute()
+    # Case-insensitive lookup in the in-process title index
+    await catalog.ensure_loaded(db)
     
-    if not hasattr(response, 'data') or not response.data:
+    if not len(catalog):
         raise HTTPException(status_code=404, detail="No services found")
     
-    # Find the service with matching title (case-insensitive)
-    service_data = None
-    for service in response.data:
-        if service["title"].lower() == title.lower():
-            service_data = service
-            break
-    
-    if not service_data:
-        # Try partial matching if exact match not found
-        for service in response.data:
-            if title.lower() in service["title"].lower() or service["title"].lower() in title.lower():
-                service_data = service
-                break
+    # Exact title match first, then partial matching
+    service_data = title_index.lookup(title)
     
     if not service_data:
         raise HTTPException(status_code=404, detail=f"Service with title '{title}' not found")
@@ -334,13 +493,10 @@ async def get_service_by_title(title: str):
     print(f"Found service: {service_data['title']}, Category: {service_data['category']}")
     
     # Get the min and max price across all similar services in the same category
-    category_services = [
-        s for s in response.data 
-        if s["category"] == service_data["category"]
-    ]
+    price_range = price_index.summary(service_data["category"])
     
-    min_price = min([s["price"] for s in category_services]) if category_services else service_data["price"]
-    max_price = max([s["price"] for s in category_services]) if category_services else service_data["price"]
+    min_price = price_range["min"] if price_range else service_data["price"]
+    max_price = price_range["max"] if price_range else service_data["price"]
     
     # Return the service with additional min/max price data
     return {
@@ -0,0 +1,6 @@
+"""
+Provider availability and free-slot computation.
+"""
+
+from .slots import compile_availability, free_slots, merge, subtract
+from . import availability
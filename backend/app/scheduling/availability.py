@@ -0,0 +1,108 @@
+"""
+Cached inputs of the slot engine.
+
+Each provider's availability is compiled once and kept for SLOT_CACHE_TTL
+seconds, as are the busy intervals (scheduled_at to ends_at) of their
+pending/confirmed bookings per requested range. Profile and booking
+writes call invalidate() for the provider so new slots and bookings show
+up immediately.
+
+Availability windows are wall-clock times in the provider's timezone
+(their profile's, else PROVIDER_TIMEZONE), while bookings are stored as
+instants. Bookings are converted to the provider's wall clock before they
+are subtracted, and a day's bookings are fetched between the provider's
+local midnights.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from typing import Any, Dict, List, NamedTuple, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from postgrest import AsyncPostgrestClient
+from core.cache import TTLCache
+from core.config import PROVIDER_TIMEZONE, SLOT_CACHE_TTL, SLOT_CACHE_SIZE
+from repositories import bookings as bookings_repo
+from repositories import provider_profiles as profiles_repo
+from .slots import Interval, compile_availability, merge
+
+_compiled_cache = TTLCache(maxsize=SLOT_CACHE_SIZE, ttl=SLOT_CACHE_TTL)
+_busy_cache = TTLCache(maxsize=SLOT_CACHE_SIZE, ttl=SLOT_CACHE_TTL)
+
+class Schedule(NamedTuple):
+    windows: Dict[date, List[Interval]]
+    timezone: ZoneInfo
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse a PostgREST timestamp as an aware instant (naive ones are UTC)"""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def wall_clock(instant: datetime, tz: tzinfo) -> datetime:
+    """An instant as naive wall-clock time in a timezone"""
+    return instant.astimezone(tz).replace(tzinfo=None)
+
+def provider_timezone(name: Optional[str]) -> ZoneInfo:
+    """A provider's timezone, falling back to PROVIDER_TIMEZONE when unset or unknown"""
+    if name:
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return ZoneInfo(PROVIDER_TIMEZONE)
+
+async def get_schedule(db: AsyncPostgrestClient, provider_id: str) -> Optional[Schedule]:
+    """Compiled availability and timezone of a provider, or None if they have no profile"""
+    schedule = _compiled_cache.get(provider_id)
+    if schedule is None:
+        profile = await profiles_repo.get_by_user_id(db, provider_id, "availability,timezone")
+        if not profile:
+            return None
+        schedule = Schedule(
+            compile_availability(profile.get("availability")),
+            provider_timezone(profile.get("timezone"))
+        )
+        _compiled_cache.set(provider_id, schedule)
+    return schedule
+
+async def get_busy(
+    db: AsyncPostgrestClient,
+    provider_id: str,
+    tz: tzinfo,
+    start_day: date,
+    end_day: date
+) -> List[Interval]:
+    """Merged wall-clock intervals taken by a provider's bookings between two local dates (inclusive)"""
+    key = (provider_id, start_day, end_day)
+    busy = _busy_cache.get(key)
+    if busy is not None:
+        return busy
+
+    range_start = datetime.combine(start_day, time.min, tzinfo=tz)
+    range_end = datetime.combine(end_day + timedelta(days=1), time.min, tzinfo=tz)
+    bookings = await bookings_repo.list_overlapping(
+        db,
+        provider_id,
+        range_start.isoformat(),
+        range_end.isoformat(),
+        columns="scheduled_at,ends_at"
+    )
+
+    intervals = [
+        (wall_clock(parse_timestamp(b["scheduled_at"]), tz), wall_clock(parse_timestamp(b["ends_at"]), tz))
+        for b in bookings
+    ]
+
+    busy = merge(intervals)
+    _busy_cache.set(key, busy)
+    return busy
+
+def invalidate(provider_id: str) -> None:
+    """Drop a provider's cached availability and bookings"""
+    _compiled_cache.pop(provider_id)
+    _busy_cache.pop_where(lambda key, busy: key[0] == provider_id)
+
+def cache_stats() -> Dict[str, Any]:
+    return {
+        "availability": _compiled_cache.stats(),
+        "bookings": _busy_cache.stats(),
+    }
@@ -0,0 +1,107 @@
+"""
+Free-slot computation over provider availability.
+
+Availability is stored on provider_profiles as
+    {"YYYY-MM-DD": [{"start": "09:00", "end": "17:00"}, ...]}
+in the provider's wall-clock time. It is compiled once into merged,
+sorted (start, end) datetime intervals per date; busy intervals from
+bookings are subtracted with a linear sweep and the remaining free time
+is cut into fixed-length slots.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+Interval = Tuple[datetime, datetime]
+
+def _parse_time(value: str) -> Optional[timedelta]:
+    """Offset of a wall-clock time from midnight"""
+    # "24:00" closes a window at the following midnight
+    if value == "24:00":
+        return timedelta(days=1)
+    try:
+        parsed = time.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    return timedelta(hours=parsed.hour, minutes=parsed.minute, seconds=parsed.second)
+
+def merge(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sort intervals and merge the ones that overlap or touch"""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def compile_availability(availability: Optional[Dict[str, Any]]) -> Dict[date, List[Interval]]:
+    """Turn the availability JSON into merged intervals per date, skipping malformed entries"""
+    compiled: Dict[date, List[Interval]] = {}
+    for day_key, windows in (availability or {}).items():
+        try:
+            day = date.fromisoformat(day_key)
+        except (TypeError, ValueError):
+            continue
+
+        intervals = []
+        for window in windows or []:
+            if not isinstance(window, dict):
+                continue
+            start = _parse_time(window.get("start"))
+            end = _parse_time(window.get("end"))
+            if start is None or end is None or start >= end:
+                continue
+            midnight = datetime.combine(day, time.min)
+            intervals.append((midnight + start, midnight + end))
+
+        if intervals:
+            compiled[day] = merge(intervals)
+    return compiled
+
+def subtract(free: List[Interval], busy: List[Interval]) -> List[Interval]:
+    """Remove merged, sorted busy intervals from merged, sorted free intervals"""
+    result: List[Interval] = []
+    i = 0
+    for start, end in free:
+        # Skip busy intervals that end before this window starts
+        while i < len(busy) and busy[i][1] <= start:
+            i += 1
+
+        j = i
+        while j < len(busy) and busy[j][0] < end:
+            busy_start, busy_end = busy[j]
+            if busy_start > start:
+                result.append((start, busy_start))
+            start = max(start, busy_end)
+            if start >= end:
+                break
+            j += 1
+
+        if start < end:
+            result.append((start, end))
+    return result
+
+def free_slots(
+    compiled: Dict[date, List[Interval]],
+    busy: List[Interval],
+    start_day: date,
+    end_day: date,
+    duration: timedelta,
+    step: timedelta
+) -> List[Interval]:
+    """Slots of the given duration, starting every step, free between two dates (inclusive)"""
+    windows: List[Interval] = []
+    day = start_day
+    while day <= end_day:
+        windows.extend(compiled.get(day, ()))
+        day += timedelta(days=1)
+
+    slots: List[Interval] = []
+    for start, end in subtract(windows, busy):
+        slot_start = start
+        while slot_start + duration <= end:
+            slots.append((slot_start, slot_start + duration))
+            slot_start += step
+    return slots
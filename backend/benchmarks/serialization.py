@@ -0,0 +1,99 @@
+"""
+Serialization benchmark for our largest list responses.
+
+Renders synthetic payloads shaped like GET /api/services/providers and
+GET /api/admin/users with FastAPI's stock JSONResponse and with the
+ORJSONResponse the app now uses, and reports the gzip-compressed size.
+"direct" is an ORJSONResponse built from the rows without jsonable_encoder,
+as endpoints returning PostgREST rows unchanged do.
+
+Run from the backend directory:
+    python benchmarks/serialization.py
+"""
+
+import gzip
+import timeit
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+def make_service(provider_id: str, i: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "provider_id": provider_id,
+        "title": f"Service {i}",
+        "description": "Professional home service with all supplies included. " * 3,
+        "price": 40.0 + i,
+        "category": ["cleaning", "plumbing", "painting", "moving"][i % 4],
+        "is_active": True,
+        "created_at": (datetime(2024, 1, 1) + timedelta(hours=i)).isoformat(),
+    }
+
+def make_provider(i: int) -> dict:
+    provider_id = str(uuid.uuid4())
+    return {
+        "id": provider_id,
+        "email": f"provider{i}@example.com",
+        "full_name": f"Provider {i}",
+        "phone_number": "+1 416 555 0100",
+        "address": '{"city": "Toronto", "province": "ON", "country": "Canada"}',
+        "role": "provider",
+        "user_id": provider_id,
+        "bio": "Experienced and insured. " * 10,
+        "years_of_experience": i % 20,
+        "specialties": ["cleaning", "painting"],
+        "availability": {"2024-06-01": [{"start": "09:00", "end": "17:00"}]},
+        "ratings_average": 4.5,
+        "ratings_count": 10 + i,
+        "services": [make_service(provider_id, j) for j in range(5)],
+    }
+
+def make_user(i: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "email": f"user{i}@example.com",
+        "full_name": f"User {i}",
+        "phone_number": None,
+        "address": None,
+        "role": "client",
+        "is_verified": bool(i % 2),
+        "created_at": datetime(2024, 1, 1) + timedelta(minutes=i),
+    }
+
+PAYLOADS = {
+    "services/providers (200 providers)": [make_provider(i) for i in range(200)],
+    "admin/users (500 users)": [make_user(i) for i in range(500)],
+}
+
+def bench(response_class, payload, number: int) -> float:
+    """Milliseconds per render, including jsonable_encoder as FastAPI does"""
+    seconds = timeit.timeit(lambda: response_class(jsonable_encoder(payload)).body, number=number)
+    return seconds / number * 1000
+
+def bench_render(response_class, payload, number: int) -> float:
+    """Milliseconds per render of already-encoded data (the serializer alone)"""
+    encoded = jsonable_encoder(payload)
+    seconds = timeit.timeit(lambda: response_class(encoded).body, number=number)
+    return seconds / number * 1000
+
+def bench_direct(payload, number: int) -> float:
+    """Milliseconds per render of rows handed straight to ORJSONResponse"""
+    seconds = timeit.timeit(lambda: ORJSONResponse(payload).body, number=number)
+    return seconds / number * 1000
+
+def main(number: int = 50) -> None:
+    for name, payload in PAYLOADS.items():
+        body = ORJSONResponse(jsonable_encoder(payload)).body
+        print(f"{name}: {len(body) / 1024:.0f} KiB, {len(gzip.compress(body)) / 1024:.0f} KiB gzipped")
+        for response_class in (JSONResponse, ORJSONResponse):
+            print(
+                f"  {response_class.__name__:<15}"
+                f" serializer {bench_render(response_class, payload, number):7.2f} ms"
+                f"   full response {bench(response_class, payload, number):7.2f} ms"
+            )
+        print(f"  {'direct':<15} full response {bench_direct(payload, number):7.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+-- Provider rating aggregates maintained incrementally.
+--
+-- provider_profiles keeps a running sum and count of its reviews' ratings,
+-- updated in the same transaction as every review insert/delete, so the
+-- average never needs the full list of ratings and concurrent reviews
+-- cannot overwrite each other. reconcile_provider_ratings() recomputes
+-- everything from the reviews table to repair any drift.
+
+alter table provider_profiles
+    add column if not exists ratings_sum bigint default 0,
+    add column if not exists ratings_count integer default 0;
+
+create or replace function apply_review_rating()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'INSERT' then
+        update provider_profiles
+        set ratings_sum = coalesce(ratings_sum, 0) + new.rating,
+            ratings_count = coalesce(ratings_count, 0) + 1,
+            ratings_average = (coalesce(ratings_sum, 0) + new.rating)::numeric / (coalesce(ratings_count, 0) + 1)
+        where user_id = new.provider_id;
+        return new;
+    end if;
+
+    update provider_profiles
+    set ratings_sum = coalesce(ratings_sum, 0) - old.rating,
+        ratings_count = greatest(coalesce(ratings_count, 0) - 1, 0),
+        ratings_average = coalesce((coalesce(ratings_sum, 0) - old.rating)::numeric / nullif(coalesce(ratings_count, 0) - 1, 0), 0)
+    where user_id = old.provider_id;
+    return old;
+end;
+$$;
+
+drop trigger if exists reviews_apply_rating on reviews;
+create trigger reviews_apply_rating
+    after insert or delete on reviews
+    for each row execute function apply_review_rating();
+
+-- Returns a one-row table so PostgREST clients get a list back
+create or replace function reconcile_provider_ratings()
+returns table (repaired integer)
+language plpgsql
+as $$
+declare
+    repaired_count integer;
+begin
+    update provider_profiles p
+    set ratings_sum = coalesce(r.rating_sum, 0),
+        ratings_count = coalesce(r.rating_count, 0),
+        ratings_average = coalesce(r.rating_sum::numeric / nullif(r.rating_count, 0), 0)
+    from provider_profiles p2
+    left join (
+        select provider_id, sum(rating) as rating_sum, count(*) as rating_count
+        from reviews
+        group by provider_id
+    ) r on r.provider_id = p2.user_id
+    where p.user_id = p2.user_id
+      and (p.ratings_sum is distinct from coalesce(r.rating_sum, 0)
+           or p.ratings_count is distinct from coalesce(r.rating_count, 0)
+           or p.ratings_average is distinct from coalesce(r.rating_sum::numeric / nullif(r.rating_count, 0), 0));
+
+    get diagnostics repaired_count = row_count;
+    return query select repaired_count;
+end;
+$$;
+
+-- Backfill the running sums for existing reviews
+select reconcile_provider_ratings();
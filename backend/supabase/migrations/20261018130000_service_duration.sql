@@ -0,0 +1,10 @@
+-- How long a booking of a service takes; the slot engine blocks this much
+-- time from a booking's scheduled_at.
+
+alter table services
+    add column if not exists duration_minutes integer not null default 60
+        check (duration_minutes > 0);
+
+-- Slot lookups read one provider's upcoming bookings in a time range
+create index if not exists bookings_provider_scheduled_at_idx
+    on bookings (provider_id, scheduled_at);
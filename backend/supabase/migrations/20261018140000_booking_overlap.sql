@@ -0,0 +1,54 @@
+-- Reject overlapping bookings for the same provider.
+--
+-- Each booking stores when it ends (scheduled_at plus its service's
+-- duration_minutes). The trigger below is the only writer of ends_at; the
+-- API computes the same interval for its pre-check but never sends it. An
+-- exclusion constraint guarantees no two
+-- pending/confirmed bookings of a provider overlap, even when requests
+-- for the same slot race. The API maps violations (SQLSTATE 23P01) to 409.
+-- Assumes scheduled_at is a timestamptz; existing overlapping bookings must
+-- be resolved before this migration can add the constraint.
+
+create extension if not exists btree_gist;
+
+alter table bookings add column if not exists ends_at timestamptz;
+
+create or replace function set_booking_ends_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.ends_at := new.scheduled_at + make_interval(mins => coalesce(
+        (select duration_minutes from services where id = new.service_id),
+        60
+    ));
+    return new;
+end;
+$$;
+
+drop trigger if exists bookings_set_ends_at on bookings;
+create trigger bookings_set_ends_at
+    before insert or update of scheduled_at, service_id on bookings
+    for each row execute function set_booking_ends_at();
+
+update bookings b
+set ends_at = b.scheduled_at + make_interval(mins => coalesce(s.duration_minutes, 60))
+from services s
+where s.id = b.service_id and b.ends_at is null;
+
+update bookings
+set ends_at = scheduled_at + interval '60 minutes'
+where ends_at is null;
+
+alter table bookings alter column ends_at set not null;
+
+alter table bookings drop constraint if exists bookings_no_overlap;
+alter table bookings
+    add constraint bookings_no_overlap
+    exclude using gist (
+        provider_id with =,
+        tstzrange(scheduled_at, ends_at) with &&
+    ) where (status in ('pending', 'confirmed'));
+
+-- Range lookups by provider (overlap pre-checks and the slot engine) use
+-- bookings_provider_scheduled_at_idx from the service duration migration
@@ -0,0 +1,15 @@
+-- Provider coordinates for proximity search. The API fills them in by
+-- geocoding the profile's location (or the provider's address) against a
+-- postal code centroid table; providers that cannot be geocoded keep nulls
+-- and are left out of GET /api/providers/nearby.
+
+alter table provider_profiles
+    add column if not exists latitude double precision
+        check (latitude between -90 and 90),
+    add column if not exists longitude double precision
+        check (longitude between -180 and 180);
+
+-- The API's location index loads only geocoded providers
+create index if not exists provider_profiles_located_idx
+    on provider_profiles (user_id, latitude, longitude)
+    where latitude is not null and longitude is not null;
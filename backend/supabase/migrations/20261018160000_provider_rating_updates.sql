@@ -0,0 +1,46 @@
+-- Keep provider rating aggregates right when a review is edited, and keep
+-- the repair function away from API clients.
+--
+-- Reviews were only counted on insert and delete, so changing a rating
+-- (or moving a review to another provider) left the running sum stale
+-- until the next reconcile. reconcile_provider_ratings() rewrites every
+-- provider's aggregates; like any new function it was executable by anon
+-- and authenticated, i.e. by anyone holding the public API key. It is now
+-- reserved to service_role, which the admin endpoint calls it as.
+
+create or replace function apply_review_rating()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op in ('DELETE', 'UPDATE') then
+        update provider_profiles
+        set ratings_sum = coalesce(ratings_sum, 0) - old.rating,
+            ratings_count = greatest(coalesce(ratings_count, 0) - 1, 0),
+            ratings_average = coalesce((coalesce(ratings_sum, 0) - old.rating)::numeric / nullif(coalesce(ratings_count, 0) - 1, 0), 0)
+        where user_id = old.provider_id;
+    end if;
+
+    if tg_op in ('INSERT', 'UPDATE') then
+        update provider_profiles
+        set ratings_sum = coalesce(ratings_sum, 0) + new.rating,
+            ratings_count = coalesce(ratings_count, 0) + 1,
+            ratings_average = (coalesce(ratings_sum, 0) + new.rating)::numeric / (coalesce(ratings_count, 0) + 1)
+        where user_id = new.provider_id;
+        return new;
+    end if;
+
+    return old;
+end;
+$$;
+
+drop trigger if exists reviews_apply_rating on reviews;
+create trigger reviews_apply_rating
+    after insert or update of rating, provider_id or delete on reviews
+    for each row execute function apply_review_rating();
+
+revoke execute on function reconcile_provider_ratings() from public, anon, authenticated;
+grant execute on function reconcile_provider_ratings() to service_role;
+
+-- Repair aggregates of reviews edited before the trigger covered updates
+select reconcile_provider_ratings();
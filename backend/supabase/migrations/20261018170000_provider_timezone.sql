@@ -0,0 +1,9 @@
+-- Timezone of a provider's availability windows.
+--
+-- Availability is entered as wall-clock times while bookings are stored as
+-- instants (timestamptz), so the slot engine converts bookings to the
+-- provider's timezone before subtracting them. Providers without one use
+-- the API's PROVIDER_TIMEZONE setting.
+
+alter table provider_profiles
+    add column if not exists timezone text;
@@ -0,0 +1,20 @@
+-- Total revenue of paid bookings, summed in the database.
+--
+-- PostgREST aggregate selects (total_price.sum()) need db-aggregates-enabled,
+-- which Supabase leaves off, and summing client side means downloading every
+-- paid price and stopping at max_rows. Returns a one-row table so PostgREST
+-- clients get a list back. Revenue is admin-only data, so like
+-- reconcile_provider_ratings() only service_role may call it.
+
+create or replace function sum_paid_revenue()
+returns table (total numeric)
+language sql
+stable
+as $$
+    select coalesce(sum(total_price), 0)::numeric
+    from bookings
+    where payment_status = 'paid';
+$$;
+
+revoke execute on function sum_paid_revenue() from public, anon, authenticated;
+grant execute on function sum_paid_revenue() to service_role;
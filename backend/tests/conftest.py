@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The app imports its packages top-level (core, routers, ...), as run.py does
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+os.environ.setdefault("SUPABASE_URL", "http://supabase.test")
+os.environ.setdefault("SUPABASE_KEY", "anon.key.test")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-secret-signing-key-of-32-bytes")
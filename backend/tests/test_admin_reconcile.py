@@ -0,0 +1,51 @@
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from postgrest import AsyncPostgrestClient
+
+import core.supabase as supabase
+from main import app
+from routers.admin import admin_required
+
+def service_db(handler) -> AsyncPostgrestClient:
+    db = AsyncPostgrestClient("http://supabase.test/rest/v1")
+    db.session._transport = httpx.MockTransport(handler)
+    return db
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[admin_required] = lambda: {"id": "admin-1", "role": "admin"}
+    with TestClient(app) as client:
+        yield client
+    app.dependency_overrides.clear()
+
+def test_reconcile_uses_service_role_client(client):
+    app.dependency_overrides[supabase.get_service_db] = lambda: service_db(
+        lambda request: httpx.Response(200, json=[{"repaired": 3}])
+    )
+
+    response = client.post("/api/admin/ratings/reconcile")
+
+    assert response.status_code == 200
+    assert response.json() == {"repaired": 3}
+
+def test_reconcile_permission_denied_is_403(client):
+    app.dependency_overrides[supabase.get_service_db] = lambda: service_db(
+        lambda request: httpx.Response(401, json={
+            "code": "42501",
+            "message": "permission denied for function reconcile_provider_ratings",
+            "details": None,
+            "hint": None,
+        })
+    )
+
+    response = client.post("/api/admin/ratings/reconcile")
+
+    assert response.status_code == 403
+
+def test_reconcile_without_service_role_key_is_503(client, monkeypatch):
+    monkeypatch.setattr(supabase, "SUPABASE_SERVICE_ROLE_KEY", None)
+
+    response = client.post("/api/admin/ratings/reconcile")
+
+    assert response.status_code == 503
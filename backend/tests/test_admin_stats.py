@@ -0,0 +1,32 @@
+import httpx
+from fastapi.testclient import TestClient
+from postgrest import AsyncPostgrestClient
+
+import core.supabase as supabase
+from main import app
+from routers.admin import admin_required
+
+def test_revenue_is_summed_by_the_database():
+    service_requests = []
+
+    def service_handler(request: httpx.Request) -> httpx.Response:
+        service_requests.append(request)
+        return httpx.Response(200, json=[{"total": 1234.5}])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=[], headers={"Content-Range": "0-0/7"})
+
+    service_db = AsyncPostgrestClient("http://supabase.test/rest/v1")
+    service_db.session._transport = httpx.MockTransport(service_handler)
+    app.dependency_overrides[admin_required] = lambda: {"id": "admin-1", "role": "admin"}
+    app.dependency_overrides[supabase.get_service_db] = lambda: service_db
+    try:
+        with TestClient(app) as client:
+            supabase.get_db().session._transport = httpx.MockTransport(handler)
+            response = client.get("/api/admin/dashboard/stats")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json()["payments"] == {"paid_bookings": 7, "total_revenue": 1234.5}
+    assert [r.url.path for r in service_requests] == ["/rest/v1/rpc/sum_paid_revenue"]
@@ -0,0 +1,73 @@
+import httpx
+from fastapi.testclient import TestClient
+
+import core.supabase as supabase
+from main import app
+
+SESSION = {
+    "access_token": "access-token",
+    "token_type": "bearer",
+    "expires_in": 3600,
+    "refresh_token": "refresh-token",
+    "user": {
+        "id": "user-1",
+        "aud": "authenticated",
+        "email": "user@example.com",
+        "app_metadata": {},
+        "user_metadata": {},
+        "created_at": "2024-01-01T00:00:00Z",
+    },
+}
+
+def handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/auth/v1/token":
+        return httpx.Response(200, json=SESSION)
+    return httpx.Response(404, json={})
+
+def test_auth_client_holds_no_session_after_login(monkeypatch):
+    created = []
+    create_auth_client = supabase.create_auth_client
+
+    def recording_create_auth_client():
+        auth = create_auth_client()
+        created.append(auth)
+        return auth
+
+    monkeypatch.setattr(supabase, "create_auth_client", recording_create_auth_client)
+
+    with TestClient(app) as client:
+        supabase.get_http()._transport = httpx.MockTransport(handler)
+
+        for _ in range(2):
+            response = client.post("/api/auth/login", json={"email": "user@example.com", "password": "secret"})
+            assert response.status_code == 200
+            assert response.json()["access_token"] == "access-token"
+
+    # Each request got its own client, and none kept the signed-in session
+    assert len(created) == 2
+    assert created[0] is not created[1]
+    assert all(auth._in_memory_session is None for auth in created)
+
+def test_local_verification_builds_no_auth_client(monkeypatch):
+    import asyncio
+    import time
+
+    import jwt
+    from fastapi.security import HTTPAuthorizationCredentials
+
+    import auth.verify_supabase_token as verify
+
+    def unexpected_client():
+        raise AssertionError("an auth client was built for a locally verified token")
+
+    monkeypatch.setattr(verify, "AUTH_REMOTE_CHECK", False)
+    monkeypatch.setattr(verify, "create_auth_client", unexpected_client)
+    token = jwt.encode(
+        {"sub": "user-1", "aud": "authenticated", "exp": int(time.time()) + 60},
+        verify.SUPABASE_JWT_SECRET,
+        algorithm="HS256",
+    )
+
+    user = asyncio.run(verify.get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)))
+
+    assert user["id"] == "user-1"
@@ -0,0 +1,56 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import httpx
+from postgrest import AsyncPostgrestClient
+
+from scheduling import availability, free_slots
+
+DAY = date(2026, 10, 19)
+TORONTO = ZoneInfo("America/Toronto")
+
+def mock_db(handler) -> AsyncPostgrestClient:
+    db = AsyncPostgrestClient("http://supabase.test/rest/v1")
+    db.session._transport = httpx.MockTransport(handler)
+    return db
+
+def test_utc_booking_blocks_provider_local_time():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path.endswith("/provider_profiles"):
+            return httpx.Response(200, json=[{
+                "availability": {DAY.isoformat(): [{"start": "09:00", "end": "12:00"}]},
+                "timezone": "America/Toronto",
+            }])
+        # A 10:00 EDT booking, stored as a UTC instant
+        return httpx.Response(200, json=[{
+            "scheduled_at": "2026-10-19T14:00:00+00:00",
+            "ends_at": "2026-10-19T15:00:00+00:00",
+        }])
+
+    async def slots():
+        db = mock_db(handler)
+        availability.invalidate("provider-1")
+        schedule = await availability.get_schedule(db, "provider-1")
+        busy = await availability.get_busy(db, "provider-1", schedule.timezone, DAY, DAY)
+        return schedule, free_slots(schedule.windows, busy, DAY, DAY, timedelta(hours=1), timedelta(hours=1))
+
+    schedule, slots = asyncio.run(slots())
+
+    assert schedule.timezone == TORONTO
+    assert slots == [
+        (datetime(2026, 10, 19, 9), datetime(2026, 10, 19, 10)),
+        (datetime(2026, 10, 19, 11), datetime(2026, 10, 19, 12)),
+    ]
+
+    # Bookings are fetched between the provider's local midnights
+    bookings_query = str(requests[-1].url.params)
+    assert "scheduled_at=lt.2026-10-20T00%3A00%3A00-04%3A00" in bookings_query
+    assert "ends_at=gt.2026-10-19T00%3A00%3A00-04%3A00" in bookings_query
+
+def test_unknown_timezone_falls_back_to_default():
+    assert availability.provider_timezone("Not/AZone") == ZoneInfo("America/Toronto")
+    assert availability.provider_timezone(None) == ZoneInfo("America/Toronto")
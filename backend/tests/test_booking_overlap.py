@@ -0,0 +1,72 @@
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import core.supabase as supabase
+from auth.verify_supabase_token import get_current_user
+from main import app
+
+BOOKING = {
+    "id": "b1",
+    "service_id": "s1",
+    "client_id": "client-1",
+    "provider_id": "provider-1",
+    "status": "pending",
+    "total_price": 80,
+    "scheduled_at": "2026-10-20T14:00:00+00:00",
+    # Written when the service took an hour; it now takes 90 minutes
+    "ends_at": "2026-10-20T15:00:00+00:00",
+    "created_at": "2026-10-18T00:00:00+00:00",
+    "notes": None,
+}
+
+@pytest.fixture
+def client():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        path = request.url.path
+        if path.endswith("/services"):
+            return httpx.Response(200, json=[{"id": "s1", "provider_id": "provider-1", "price": 80, "duration_minutes": 90}])
+        if path.endswith("/bookings") and request.method == "GET" and "scheduled_at" in request.url.params:
+            return httpx.Response(200, json=[])
+        if path.endswith("/bookings") and request.method == "GET":
+            return httpx.Response(200, json=[BOOKING])
+        return httpx.Response(201, json=[dict(BOOKING, **json.loads(request.content))])
+
+    app.dependency_overrides[get_current_user] = lambda: {"id": "client-1"}
+    with TestClient(app) as client:
+        supabase.get_db().session._transport = httpx.MockTransport(handler)
+        client.requests = requests
+        yield client
+    app.dependency_overrides.clear()
+
+def overlap_checks(client):
+    return [
+        r.url.params for r in client.requests
+        if r.method == "GET" and r.url.path.endswith("/bookings") and "scheduled_at" in r.url.params
+    ]
+
+def writes(client):
+    return [json.loads(r.content) for r in client.requests if r.method in ("POST", "PATCH")]
+
+def test_create_checks_the_service_duration_and_leaves_ends_at_to_the_trigger(client):
+    response = client.post("/api/bookings/", json={"service_id": "s1", "scheduled_at": "2026-10-21T09:00:00+00:00"})
+
+    assert response.status_code == 201
+    (check,) = overlap_checks(client)
+    assert check["scheduled_at"] == "lt.2026-10-21T10:30:00+00:00"
+    assert check["ends_at"] == "gt.2026-10-21T09:00:00+00:00"
+    assert "ends_at" not in writes(client)[0]
+
+def test_moving_a_booking_checks_the_current_service_duration(client):
+    response = client.put("/api/bookings/b1", json={"scheduled_at": "2026-10-21T09:00:00+00:00"})
+
+    assert response.status_code == 200
+    # The trigger recomputes ends_at from the service, not the booking's old length
+    (check,) = overlap_checks(client)
+    assert check["scheduled_at"] == "lt.2026-10-21T10:30:00+00:00"
+    assert "ends_at" not in writes(client)[0]
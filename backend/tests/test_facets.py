@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from catalog.facets import FacetIndex
+
+CATEGORIES = ["cleaning", "garden", "moving", None]
+
+def brute_force_facets(services, category=None, min_price=None, max_price=None):
+    def in_price(s):
+        price = s.get("price")
+        if min_price is not None and (price is None or price < min_price):
+            return False
+        if max_price is not None and (price is None or price > max_price):
+            return False
+        return True
+
+    counts = {}
+    for s in services:
+        if in_price(s):
+            counts[s.get("category")] = counts.get(s.get("category"), 0) + 1
+    return {
+        "total": sum(1 for s in services if in_price(s) and (category is None or s.get("category") == category)),
+        "categories": counts,
+        "priced_in_category": sum(
+            1 for s in services
+            if s.get("price") is not None and (category is None or s.get("category") == category)
+        ),
+    }
+
+@pytest.mark.parametrize("seed", range(20))
+def test_counts_match_a_brute_force_filter(seed):
+    rng = random.Random(seed)
+    services = [
+        {
+            "id": f"s{i}",
+            "category": rng.choice(CATEGORIES),
+            "price": None if rng.random() < 0.1 else round(rng.uniform(10, 200), 2),
+        }
+        for i in range(rng.randint(0, 300))
+    ]
+    index = FacetIndex()
+    index.reset(services)
+    # Writes after the load are reflected too
+    for s in services[:10]:
+        index.discard(s)
+    services = services[10:]
+
+    category = rng.choice(CATEGORIES[:-1] + [None, "unknown"])
+    min_price = rng.choice([None, 50.0])
+    max_price = rng.choice([None, 150.0])
+
+    facets = index.facets(category, min_price, max_price, buckets=5)
+    expected = brute_force_facets(services, category, min_price, max_price)
+
+    assert facets["total"] == expected["total"]
+    assert {c["category"]: c["count"] for c in facets["categories"]} == expected["categories"]
+    # The histogram ignores the price filter and covers every priced service in the category
+    assert sum(b["count"] for b in facets["price_buckets"]) == expected["priced_in_category"]
+    counts = [c["count"] for c in facets["categories"]]
+    assert counts == sorted(counts, reverse=True)
+
+def test_histogram_buckets_span_the_category_prices():
+    index = FacetIndex()
+    index.reset([{"id": str(p), "category": "c", "price": float(p)} for p in (10, 20, 30, 40, 50)])
+
+    buckets = index.facets("c", buckets=4)["price_buckets"]
+
+    assert [(b["min"], b["max"], b["count"]) for b in buckets] == [
+        (10.0, 20.0, 1), (20.0, 30.0, 1), (30.0, 40.0, 1), (40.0, 50.0, 2),
+    ]
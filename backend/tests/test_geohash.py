@@ -0,0 +1,70 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from core.config import NEARBY_MAX_RADIUS_KM
+from geo import ProviderLocationIndex, covering, encode, haversine_km
+from geo.geohash import cell_size
+
+EARTH_RADIUS_KM = 6371.0088
+
+def destination(latitude, longitude, bearing_deg, distance_km):
+    """The point distance_km from a start point along a bearing (spherical Earth)"""
+    lat1, lng1, bearing = map(math.radians, (latitude, longitude, bearing_deg))
+    d = distance_km / EARTH_RADIUS_KM
+    lat2 = math.asin(math.sin(lat1) * math.cos(d) + math.cos(lat1) * math.sin(d) * math.cos(bearing))
+    lng2 = lng1 + math.atan2(
+        math.sin(bearing) * math.sin(d) * math.cos(lat1),
+        math.cos(d) - math.sin(lat1) * math.sin(lat2),
+    )
+    return math.degrees(lat2), (math.degrees(lng2) + 540) % 360 - 180
+
+def test_encode_matches_reference_hash():
+    assert encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+@pytest.mark.parametrize("radius_km", [0.5, 5, 25, NEARBY_MAX_RADIUS_KM])
+@pytest.mark.parametrize("latitude, longitude", [
+    (43.6532, -79.3832),   # Toronto
+    (49.2827, -123.1207),  # Vancouver
+    (62.4540, -114.3718),  # Yellowknife, where longitude cells are narrow
+    (45.0, -179.99),       # next to the antimeridian
+])
+def test_cover_contains_the_whole_circle(latitude, longitude, radius_km):
+    prefixes = covering(latitude, longitude, radius_km)
+
+    assert len(prefixes) <= 9
+    for bearing in range(0, 360, 5):
+        point = destination(latitude, longitude, bearing, radius_km * 0.999)
+        assert encode(*point).startswith(tuple(prefixes)), (bearing, point)
+
+def test_cover_at_the_radius_limit_from_a_cell_corner():
+    # Start just inside the corner of a cell, the worst case for a 3 x 3 cover
+    prefixes = covering(43.6532, -79.3832, NEARBY_MAX_RADIUS_KM)
+    height, width = cell_size(len(prefixes[0]))
+    corner_lat = math.floor(43.6532 / height) * height + 1e-9
+    corner_lng = math.floor(-79.3832 / width) * width + 1e-9
+
+    prefixes = covering(corner_lat, corner_lng, NEARBY_MAX_RADIUS_KM)
+    for bearing in range(0, 360, 2):
+        point = destination(corner_lat, corner_lng, bearing, NEARBY_MAX_RADIUS_KM * 0.999)
+        assert encode(*point).startswith(tuple(prefixes)), bearing
+
+def test_nearby_matches_brute_force():
+    rng = random.Random(23)
+    points = {f"p{i}": (rng.uniform(42, 46), rng.uniform(-81, -77)) for i in range(2000)}
+    index = ProviderLocationIndex(ttl=60)
+    index.reset([{"user_id": p, "latitude": lat, "longitude": lng} for p, (lat, lng) in points.items()])
+
+    ids = list(points)
+    coordinates = np.array([points[p] for p in ids])
+    for _ in range(20):
+        lat, lng = rng.uniform(42, 46), rng.uniform(-81, -77)
+        radius = rng.choice([5, 25, NEARBY_MAX_RADIUS_KM])
+        distances = haversine_km(lat, lng, coordinates[:, 0], coordinates[:, 1])
+        expected = sorted((d, p) for p, d in zip(ids, distances) if d <= radius)[:50]
+
+        nearest = index.nearby(lat, lng, radius, 50)
+
+        assert [p for p, _ in nearest] == [p for _, p in expected]
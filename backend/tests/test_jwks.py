@@ -0,0 +1,47 @@
+import base64
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import auth.verify_supabase_token as verify
+import core.supabase as supabase
+from auth.jwks import JWKSCache
+from main import app
+
+JWKS_URL = "http://supabase.test/auth/v1/.well-known/jwks.json"
+
+def segment(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+# Only the header is read before the key lookup, so the signature need not be valid
+TOKEN = ".".join([segment({"alg": "RS256", "kid": "key-1", "typ": "JWT"}), segment({"sub": "user-1"}), "c2ln"])
+
+@pytest.mark.parametrize("response", [
+    httpx.Response(200, content=b"<html>Bad gateway</html>"),
+    httpx.Response(200, json=["not", "a", "key", "set"]),
+    httpx.Response(200, json={"keys": "key-1"}),
+    httpx.Response(502, json={}),
+])
+def test_unusable_jwks_response_is_a_503(monkeypatch, response):
+    monkeypatch.setattr(verify, "jwks_cache", JWKSCache(JWKS_URL, ttl=60, min_refresh_interval=0))
+
+    with TestClient(app) as client:
+        supabase.get_http()._transport = httpx.MockTransport(lambda request: response)
+        result = client.get("/api/bookings/", headers={"Authorization": f"Bearer {TOKEN}"})
+
+    assert result.status_code == 503
+
+def test_malformed_keys_are_skipped(monkeypatch):
+    cache = JWKSCache(JWKS_URL, ttl=60, min_refresh_interval=0)
+    monkeypatch.setattr(verify, "jwks_cache", cache)
+    jwks = {"keys": ["key-1", {"kid": "key-1", "kty": "RSA", "n": 5, "e": "AQAB"}]}
+
+    with TestClient(app) as client:
+        supabase.get_http()._transport = httpx.MockTransport(lambda request: httpx.Response(200, json=jwks))
+        result = client.get("/api/bookings/", headers={"Authorization": f"Bearer {TOKEN}"})
+
+    # The key set loaded but holds no usable key for the token
+    assert result.status_code == 401
+    assert cache.refresh_errors == 0
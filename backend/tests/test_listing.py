@@ -0,0 +1,46 @@
+import uuid
+
+from catalog import ListingIndex
+from core.pagination import decode_cursor, encode_cursor
+
+def service(n: int, created_at: str, **fields):
+    return {"id": str(uuid.UUID(int=n)), "created_at": created_at, "is_active": True, **fields}
+
+def walk(index: ListingIndex, limit: int, **filters):
+    """Page through an index the way a client follows X-Next-Cursor"""
+    seen, after = [], None
+    while True:
+        page = index.page(after, limit, **filters)
+        seen.extend(page[:limit])
+        if len(page) <= limit:
+            return seen
+        after = decode_cursor(encode_cursor(page[limit - 1]))
+
+def test_pages_are_newest_first_with_ties_broken_by_id():
+    services = [
+        service(1, "2026-10-18T09:00:00+00:00"),
+        service(4, "2026-10-18T10:00:00.5+00:00"),
+        service(2, "2026-10-18T10:00:00.5+00:00"),
+        service(3, "2026-10-18T10:00:00.500000+00:00"),
+        service(5, "2026-10-18T11:00:00Z"),
+    ]
+    index = ListingIndex()
+    index.reset(services)
+
+    ids = [int(uuid.UUID(s["id"])) for s in walk(index, limit=2)]
+
+    assert ids == [5, 4, 3, 2, 1]
+
+def test_filters_match_the_database_query():
+    index = ListingIndex()
+    index.reset([
+        service(1, "2026-10-18T09:00:00+00:00", category="garden", price=40.0, provider_id="u1"),
+        service(2, "2026-10-18T09:01:00+00:00", category="cleaning", price=None, provider_id="u1"),
+        service(3, "2026-10-18T09:02:00+00:00", category="cleaning", price=80.0, provider_id="u2"),
+        service(4, "2026-10-18T09:03:00+00:00", category="cleaning", price=20.0, provider_id="u1"),
+    ])
+    index.discard(service(4, "2026-10-18T09:03:00+00:00"))
+
+    assert [s["price"] for s in walk(index, 1, category="cleaning")] == [80.0, None]
+    assert [s["price"] for s in walk(index, 1, min_price=30)] == [80.0, 40.0]
+    assert [s["category"] for s in walk(index, 5, provider_id="u1")] == ["cleaning", "garden"]
@@ -0,0 +1,81 @@
+import asyncio
+import base64
+import json
+import re
+import uuid
+from datetime import datetime
+
+import httpx
+import pytest
+from fastapi import HTTPException, Response
+from postgrest import AsyncPostgrestClient
+
+from core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, keyset, paginate
+
+ROW_ID = str(uuid.UUID(int=1))
+
+def raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+def test_cursor_round_trips_with_normalized_timestamp():
+    cursor = encode_cursor({"created_at": "2026-10-18T09:30:00.12+00:00", "id": ROW_ID})
+
+    assert decode_cursor(cursor) == ("2026-10-18T09:30:00.120000+00:00", ROW_ID)
+
+@pytest.mark.parametrize("cursor", [
+    raw_cursor(['2026-10-18T09:30:00+00:00",id.gt."0', ROW_ID]),
+    raw_cursor(["2026-10-18T09:30:00+00:00", 'x")']),
+    raw_cursor([1, 2]),
+    raw_cursor({}),
+    "not base64!",
+])
+def test_tampered_cursors_are_rejected(cursor):
+    with pytest.raises(HTTPException) as e:
+        decode_cursor(cursor)
+
+    assert e.value.status_code == 400
+
+# Several rows share a created_at, so only the id tie-break keeps pages apart
+ROWS = [
+    {"id": str(uuid.UUID(int=i)), "created_at": f"2026-10-18T09:{30 + i // 3:02d}:00+00:00"}
+    for i in range(1, 11)
+]
+
+OR_PATTERN = re.compile(r'^\(created_at\.lt\."(.+)",and\(created_at\.eq\."(.+)",id\.lt\."(.+)"\)\)$')
+
+def keyset_page(request: httpx.Request):
+    """Apply keyset()'s filter, order and limit the way PostgREST would"""
+    params = request.url.params
+    assert params["order"] == "created_at.desc,id.desc"
+    rows = sorted(ROWS, key=lambda r: (r["created_at"], r["id"]), reverse=True)
+    if "or" in params:
+        created_at, same_created_at, row_id = OR_PATTERN.match(params["or"]).groups()
+        assert created_at == same_created_at
+        after = datetime.fromisoformat(created_at)
+        rows = [
+            r for r in rows
+            if datetime.fromisoformat(r["created_at"]) < after
+            or (datetime.fromisoformat(r["created_at"]) == after and r["id"] < row_id)
+        ]
+    return rows[:int(params["limit"])]
+
+def test_keyset_walk_breaks_created_at_ties_by_id():
+    db = AsyncPostgrestClient("http://supabase.test/rest/v1")
+    db.session._transport = httpx.MockTransport(lambda request: httpx.Response(200, json=keyset_page(request)))
+
+    async def walk():
+        seen, cursor = [], None
+        while True:
+            query = db.from_("bookings").select("*")
+            rows = (await keyset(query, decode_cursor(cursor), 3).execute()).data
+            response = Response()
+            seen.extend(paginate(rows, 3, response))
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not cursor:
+                return seen
+
+    seen = asyncio.run(walk())
+
+    assert [r["id"] for r in seen] == [
+        r["id"] for r in sorted(ROWS, key=lambda r: (r["created_at"], r["id"]), reverse=True)
+    ]
@@ -0,0 +1,86 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from postgrest import AsyncPostgrestClient
+
+import core.supabase as supabase
+import routers.admin as admin
+from geo import index as geo_index
+from main import app
+
+PROFILES = [
+    {"id": f"p{i:02d}", "user_id": f"u{i:02d}", "location": None, "latitude": None, "longitude": None}
+    for i in range(7)
+]
+
+def profiles_page(request: httpx.Request, rows):
+    """Serve an id-ordered page the way PostgREST would"""
+    after = request.url.params.get("id", "gt.")[3:]
+    limit = int(request.url.params["limit"])
+    return [row for row in sorted(rows, key=lambda r: r["id"]) if row["id"] > after][:limit]
+
+def mock_db(handler) -> AsyncPostgrestClient:
+    db = AsyncPostgrestClient("http://supabase.test/rest/v1")
+    db.session._transport = httpx.MockTransport(handler)
+    return db
+
+def test_location_index_loads_every_page():
+    located = [dict(p, latitude=43.6 + i / 100, longitude=-79.4) for i, p in enumerate(PROFILES)]
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=profiles_page(request, located))
+
+    index = geo_index.ProviderLocationIndex(ttl=60)
+    index.page_size = 3
+    asyncio.run(index.load(mock_db(handler)))
+
+    assert len(index) == len(PROFILES)
+    assert len(requests) == 3
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[admin.admin_required] = lambda: {"id": "admin-1", "role": "admin"}
+    with TestClient(app) as client:
+        yield client
+    app.dependency_overrides.clear()
+
+def test_geocode_backfill_advances_past_ungeocodable_rows(client, monkeypatch):
+    monkeypatch.setattr(admin, "GEOCODE_BATCH_SIZE", 2)
+    profile_requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/provider_profiles"):
+            profile_requests.append(request)
+            return httpx.Response(200, json=profiles_page(request, PROFILES))
+        return httpx.Response(200, json=[])
+
+    supabase.get_db().session._transport = httpx.MockTransport(handler)
+
+    response = client.post("/api/admin/providers/geocode")
+
+    # Nothing geocodes, and every row is still visited once
+    assert response.status_code == 200
+    assert response.json() == {"located": 0, "remaining": len(PROFILES)}
+    assert len(profile_requests) == 4
+
+def test_location_writes_during_a_load_are_replayed():
+    located = [dict(p, latitude=43.6, longitude=-79.4) for p in PROFILES]
+    index = geo_index.ProviderLocationIndex(ttl=60)
+    index.page_size = 3
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = profiles_page(request, located)
+        if "id" in request.url.params:
+            # The provider moves, and another loses their coordinates, after the first page was read
+            index.upsert("u00", 49.28, -123.12)
+            index.upsert("u01", None, None)
+        return httpx.Response(200, json=page)
+
+    asyncio.run(index.load(mock_db(handler)))
+
+    assert len(index) == len(PROFILES) - 1
+    assert index.nearby(49.28, -123.12, 1, 10) == [("u00", 0.0)]
@@ -0,0 +1,72 @@
+import pytest
+
+from catalog.search import MAX_PREFIX_TERMS, SearchIndex, stem, tokenize
+
+@pytest.mark.parametrize("words", [
+    ("clean", "cleans", "cleaned", "cleaning", "cleaner"),
+    ("plumb", "plumber", "plumbers", "plumbing"),
+    ("run", "runs", "running", "runner"),
+    ("study", "studies"),
+    ("glass", "glasses"),
+])
+def test_inflections_share_a_stem(words):
+    assert len({stem(w) for w in words}) == 1
+
+@pytest.mark.parametrize("a, b", [
+    ("pain", "painting"),
+    ("ring", "run"),
+    ("bus", "business"),
+    ("class", "classic"),
+])
+def test_unrelated_words_keep_distinct_stems(a, b):
+    assert stem(a) != stem(b)
+
+def test_short_words_numbers_and_stop_words():
+    assert stem("gas") == "gas"
+    assert stem("2024s") == "2024"
+    assert tokenize("The Réno of your house") == ["reno", stem("houses")]
+
+def service(service_id: str, title: str, description: str = "", category: str = "home"):
+    return {"id": service_id, "title": title, "description": description, "category": category}
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.reset([
+        service("s1", "Plumbing repairs", "Leaks and pipes"),
+        service("s2", "Window cleaning", "We clean windows and plumbing fixtures"),
+        service("s3", "Lawn care", "Mowing", category="garden"),
+    ])
+    return index
+
+def test_title_matches_rank_above_description_matches(index):
+    assert [s["id"] for s, _ in index.search("plumber", prefix=False)] == ["s1", "s2"]
+
+def test_last_word_is_completed_by_prefix(index):
+    assert [s["id"] for s, _ in index.search("plu")] == ["s1", "s2"]
+    # A finished word is not completed
+    assert index.search("plu ") == []
+    assert index.search("plu", prefix=False) == []
+
+def test_prefix_completion_keeps_the_most_used_terms():
+    index = SearchIndex()
+    index.reset(
+        [service(f"rare{i}", f"widget{i:03d}") for i in range(MAX_PREFIX_TERMS + 10)]
+        + [service(f"common{i}", "widgetpro") for i in range(5)]
+    )
+
+    completions = index._completions("widget")
+
+    assert len(completions) == MAX_PREFIX_TERMS
+    assert completions[0] == "widgetpro"
+
+def test_removed_services_leave_the_vocabulary(index):
+    index.discard(service("s3", "Lawn care", "Mowing"))
+
+    assert index.search("lawn") == []
+    assert "lawn" not in index._terms
+    assert index.stats() == {"services": 2, "terms": len(index._terms)}
+
+def test_category_filter(index):
+    assert index.search("care", category="garden")[0][0]["id"] == "s3"
+    assert index.search("care", category="home") == []
@@ -0,0 +1,63 @@
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import core.supabase as supabase
+from auth.verify_supabase_token import get_current_user
+from catalog import catalog
+from core.config import IMPORT_MAX_LINE_BYTES
+from main import app
+
+def service_line(title: str) -> bytes:
+    return json.dumps({"title": title, "description": "d", "price": 10, "category": "c"}).encode() + b"\n"
+
+@pytest.fixture
+def client():
+    inserts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/users"):
+            return httpx.Response(200, json=[{"id": "user-1", "role": "provider"}])
+        if request.url.path.endswith("/services") and request.method == "POST":
+            rows = json.loads(request.content)
+            inserts.append(len(rows))
+            if any(row["title"] == "bad" for row in rows):
+                return httpx.Response(400, json={"code": "23514", "message": "price check", "details": None, "hint": None})
+            return httpx.Response(201, json=[dict(row, id=row["title"], created_at="2026-10-18T00:00:00+00:00") for row in rows])
+        return httpx.Response(200, json=[])
+
+    app.dependency_overrides[get_current_user] = lambda: {"id": "user-1"}
+    with TestClient(app) as client:
+        supabase.get_db().session._transport = httpx.MockTransport(handler)
+        client.inserts = inserts
+        yield client
+    app.dependency_overrides.clear()
+    catalog.install({})
+    catalog._loaded_at = 0.0
+
+def test_rejected_row_is_reported_on_its_own_line(client):
+    body = service_line("a") + service_line("bad") + service_line("c")
+
+    response = client.post("/api/services/import", content=body)
+
+    assert response.json() == {"created": 2, "failed": 1, "errors": [{"line": 2, "error": "price check"}]}
+    # One batch insert, then one insert per row of the failed batch
+    assert client.inserts == [3, 1, 1, 1]
+
+def test_overlong_line_is_dropped_while_streaming(client):
+    def chunks():
+        yield service_line("a")
+        yield b'{"title": "'
+        for _ in range(4):
+            yield b"x" * (IMPORT_MAX_LINE_BYTES // 2)
+        yield b'"}\n' + service_line("c")
+
+    response = client.post("/api/services/import", content=chunks())
+
+    assert response.json() == {
+        "created": 2,
+        "failed": 1,
+        "errors": [{"line": 2, "error": f"Line is longer than {IMPORT_MAX_LINE_BYTES} bytes"}],
+    }
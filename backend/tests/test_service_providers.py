@@ -0,0 +1,54 @@
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import core.supabase as supabase
+from catalog import catalog
+from main import app
+
+SERVICES = [
+    {"id": "s1", "provider_id": "u1", "title": "Deep Cleaning", "category": "cleaning", "is_active": True},
+    {"id": "s2", "provider_id": "u1", "title": "Lawn Mowing", "category": "garden", "is_active": True},
+    {"id": "s3", "provider_id": "u2", "title": "Window Cleaning", "category": "cleaning", "is_active": True},
+    {"id": "s4", "provider_id": "u3", "title": "Hedge Trimming", "category": "garden", "is_active": True},
+]
+
+@pytest.fixture
+def client():
+    catalog.install({s["id"]: s for s in SERVICES})
+    catalog._loaded_at = time.monotonic()
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        ids = request.url.params.get("id") or request.url.params.get("user_id")
+        ids = ids[len("in.("):-1].split(",")
+        if request.url.path.endswith("/users"):
+            return httpx.Response(200, json=[{"id": i, "full_name": i.upper()} for i in ids])
+        return httpx.Response(200, json=[{"user_id": i, "bio": "bio"} for i in ids])
+
+    with TestClient(app) as client:
+        supabase.get_db().session._transport = httpx.MockTransport(handler)
+        client.requests = requests
+        yield client
+
+    catalog.install({})
+    catalog._loaded_at = 0.0
+
+def test_providers_of_a_category_come_from_the_catalog(client):
+    response = client.get("/api/services/providers", params={"category": "cleaning"})
+
+    assert response.status_code == 200
+    providers = response.json()
+    assert [p["id"] for p in providers] == ["u1", "u2"]
+    # Only the services in the category are listed
+    assert [s["id"] for s in providers[0]["services"]] == ["s1"]
+    # Services were not fetched from the database
+    assert not any(r.url.path.endswith("/services") for r in client.requests)
+
+def test_providers_matching_a_service_name(client):
+    response = client.get("/api/services/providers", params={"service": "trim"})
+
+    assert [p["id"] for p in response.json()] == ["u3"]
@@ -0,0 +1,24 @@
+from datetime import date, datetime, timedelta
+
+from scheduling.slots import compile_availability, free_slots
+
+DAY = date(2026, 10, 18)
+
+def test_window_ending_at_midnight_offers_last_slot():
+    compiled = compile_availability({DAY.isoformat(): [{"start": "22:00", "end": "24:00"}]})
+
+    slots = free_slots(compiled, [], DAY, DAY, timedelta(minutes=60), timedelta(minutes=60))
+
+    assert slots == [
+        (datetime(2026, 10, 18, 22), datetime(2026, 10, 18, 23)),
+        (datetime(2026, 10, 18, 23), datetime(2026, 10, 19, 0)),
+    ]
+
+def test_malformed_windows_are_skipped():
+    compiled = compile_availability({DAY.isoformat(): [
+        {"start": "25:00", "end": "26:00"},
+        {"start": "18:00", "end": "17:00"},
+        {"start": "09:00", "end": "10:00"},
+    ]})
+
+    assert compiled == {DAY: [(datetime(2026, 10, 18, 9), datetime(2026, 10, 18, 10))]}
@@ -0,0 +1,69 @@
+import random
+
+from catalog.titles import TitleIndex, normalize_title
+
+def service(service_id: str, title: str):
+    return {"id": service_id, "title": title}
+
+def brute_force_lookup(services, title):
+    """The by-title rules applied by scanning every service, in load order"""
+    query = normalize_title(title)
+    if not query:
+        return None
+    titles = [(s, normalize_title(s["title"])) for s in services]
+    for rule in (lambda t: t == query, lambda t: query in t):
+        for s, t in titles:
+            if rule(t):
+                return s
+    contained = [(s, t) for s, t in titles if t and t in query]
+    # max() keeps the first of equally long titles, i.e. the earliest loaded
+    return max(contained, key=lambda st: len(st[1]))[0] if contained else None
+
+def test_lookup_rules_in_order():
+    index = TitleIndex()
+    index.reset([
+        service("s1", "Deep  Cleaning"),
+        service("s2", "Cleaning"),
+        service("s3", "Window cleaning service"),
+    ])
+
+    assert index.lookup("cleaning")["id"] == "s2"
+    assert index.lookup("deep cleaning")["id"] == "s1"
+    assert index.lookup("window clean")["id"] == "s3"
+    # Longest title contained in a long query
+    assert index.lookup("book a deep cleaning for friday")["id"] == "s1"
+    assert index.lookup("gardening") is None
+    assert index.lookup("   ") is None
+
+def test_trigram_candidates_are_confirmed_as_substrings():
+    index = TitleIndex()
+    index.reset([service("s1", "abcab")])
+
+    # Every trigram of "cabc" occurs in "abcab", but the string does not
+    assert index.lookup("cabc") is None
+    assert index.lookup("bca")["id"] == "s1"
+
+def test_discarded_titles_no_longer_match():
+    index = TitleIndex()
+    index.reset([service("s1", "Lawn mowing"), service("s2", "Mowing")])
+    index.discard(service("s2", "Mowing"))
+
+    assert index.lookup("mowing")["id"] == "s1"
+    assert index.max_length() == len("lawn mowing")
+
+def test_matches_brute_force_on_random_catalogs():
+    rng = random.Random(8)
+    words = ["deep", "clean", "lawn", "mow", "pipe", "fix", "ab", "a", "paint"]
+
+    for _ in range(200):
+        services = [
+            service(f"s{i}", " ".join(rng.choices(words, k=rng.randint(1, 3))))
+            for i in range(rng.randint(1, 12))
+        ]
+        index = TitleIndex()
+        index.reset(services)
+        for _ in range(10):
+            query = " ".join(rng.choices(words, k=rng.randint(1, 5)))
+            expected = brute_force_lookup(services, query)
+            actual = index.lookup(query)
+            assert (actual and actual["id"]) == (expected and expected["id"]), (services, query)